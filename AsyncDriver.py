@@ -0,0 +1,156 @@
+"""
+Runs games on an asyncio event loop, with player inputs queued and applied between ticks
+"""
+
+import asyncio
+
+from GameEngine import GameEngine
+from Scheduler import FixedTimestepScheduler
+
+class AsyncGame:
+    """
+    One real-time game driven by a coroutine on an event loop, so many games can share one thread.
+
+    Attributes
+    ----------
+    engine : GameEngine
+        The game to run, which must have been reset.
+
+    update_display : function, optional
+        Called on the event loop with no arguments whenever the game has changed since it was last drawn.
+
+    game_over : function, optional
+        Called on the event loop with no arguments when the game ends.
+
+    policy : function, optional
+        Called with the engine before every tick to get an action to apply, such as a `Bot.BotPlayer`.
+
+    inputs : asyncio.Queue
+        The actions waiting to be applied at the next tick boundary. `None` stops the game.
+
+    Notes
+    -----
+    Only the event loop's thread touches the engine. Other threads, like a keyboard listener, hand actions
+    over with `post_action`, so inputs never race with the game ticking.
+    """
+
+    def __init__(self, engine: GameEngine, update_display=None, game_over=None, policy=None):
+        self.engine = engine
+        self.update_display = update_display
+        self.game_over = game_over
+        self.policy = policy
+
+        self.inputs = asyncio.Queue()
+        self.loop = None
+        self.task = None
+        self.render_pending = False
+        self.drawn_frame_version = None
+
+    def start(self) -> asyncio.Task:
+        """
+        Start running the game on the current event loop.
+
+        Returns
+        -------
+        asyncio.Task
+            The task running the game.
+        """
+
+        self.task = asyncio.get_running_loop().create_task(self.run())
+        return self.task
+
+    def post_action(self, action: str):
+        """
+        Queue an action from any thread, to be applied at the next tick boundary.
+
+        Parameters
+        ----------
+        action : str
+            One of `GameEngine.ACTIONS`, or `None` to stop the game.
+        """
+
+        if self.loop is None:
+            self.inputs.put_nowait(action)
+        else:
+            self.loop.call_soon_threadsafe(self.inputs.put_nowait, action)
+
+    def stop(self):
+        """
+        Stop the game from any thread, without calling `game_over`.
+        """
+
+        self.post_action(None)
+
+    def request_render(self):
+        """
+        Draw the game once the event loop is free, drawing only once however many changes are made before then.
+        """
+
+        if self.update_display is not None and not self.render_pending:
+            self.render_pending = True
+            self.loop.call_soon(self._render)
+
+    def _render(self):
+        """
+        Draw the game if it changed since it was last drawn.
+        """
+
+        self.render_pending = False
+        if self.update_display is not None and self.engine.frame_version != self.drawn_frame_version:
+            self.drawn_frame_version = self.engine.frame_version
+            self.update_display()
+
+    async def run(self):
+        """
+        Run the game on time until it ends or is stopped.
+        """
+
+        engine = self.engine
+        self.loop = asyncio.get_running_loop()
+        scheduler = FixedTimestepScheduler(clock=self.loop.time)
+        scheduler.start(engine.game_time)
+
+        arrived_actions = []
+        while True:
+            engine.advance(scheduler.get_due_tick(), self.policy)
+            if engine.game_finished:
+                break
+
+            # apply every input that arrived since the last tick boundary
+            while arrived_actions or not self.inputs.empty():
+                action = arrived_actions.pop(0) if arrived_actions else self.inputs.get_nowait()
+                if action is None:
+                    return
+                engine.apply_action(action)
+            engine.publish_snapshot()
+            self.request_render()
+
+            # sleep until the next falling or gravity tick, or until an input arrives
+            # a policy can act on any tick, so it is woken for every tick
+            if self.policy is not None:
+                next_tick = scheduler.current_tick
+            else:
+                next_tick = max(engine.get_next_event_tick(), scheduler.current_tick)
+            timeout = scheduler.get_time_until_tick(next_tick)
+            if timeout > 0:
+                try:
+                    arrived_actions.append(await asyncio.wait_for(self.inputs.get(), timeout))
+                except asyncio.TimeoutError:
+                    pass
+
+        # draw the final board before the game over screen
+        self._render()
+        if self.game_over is not None:
+            self.game_over()
+
+async def run_games(games: list):
+    """
+    Run many games concurrently on the current event loop until they have all ended.
+
+    Parameters
+    ----------
+    games : list
+        The `AsyncGame`s to run.
+    """
+
+    await asyncio.gather(*(game.start() for game in games))
@@ -0,0 +1,330 @@
+import numpy as np
+
+from Jelly import Jelly, JELLY_CODES
+
+EMPTY = JELLY_CODES[Jelly.EMPTY]
+GARBAGE = JELLY_CODES[Jelly.GARBAGE]
+COLOR_CODES = np.array([JELLY_CODES[jelly] for jelly in (Jelly.RED, Jelly.GREEN, Jelly.BLUE, Jelly.PURPLE, Jelly.YELLOW)],
+                       dtype=np.uint8)
+
+class BatchBoard:
+    """
+    Many boards played at once, stored as one array and stepped with whole-array operations.
+
+    The rules match `Board`: jellies fall straight down, groups of at least `num_connecting_jellies_to_pop`
+    connected same-colored jellies pop, and garbage never pops on its own but is cleared, uncounted, when a jelly
+    next to it pops. Each step places one falling group of two jellies per board directly in its final column,
+    then resolves the popping chain like `GameEngine`.
+
+    Attributes
+    ----------
+    num_boards : int
+        The number of boards in the batch.
+
+    width : int, default: 6
+        The width of each board.
+
+    height : int, default: 13
+        The height of each board, with the top row being off-screen.
+
+    num_colors : int, default: 4
+        The number of colors to choose from when generating jellies.
+
+    num_connecting_jellies_to_pop : int, default: 4
+        The number of connected jellies required to pop.
+
+    num_pops_to_level : int, default: 50
+        The number of jellies to pop before leveling up.
+
+    seed : int, optional
+        The seed for the random falling groups.
+
+    cells : numpy.ndarray
+        The `(num_boards, height, width)` uint8 array of jelly codes.
+    """
+
+    def __init__(self,
+                 num_boards,
+                 width=6,
+                 height=13,
+                 num_colors=4,
+                 num_connecting_jellies_to_pop=4,
+                 num_pops_to_level=50,
+                 seed=None
+                 ):
+        self.num_boards = num_boards
+        self.width = width
+        self.height = height
+        self.num_colors = num_colors
+        self.num_connecting_jellies_to_pop = num_connecting_jellies_to_pop
+        self.num_pops_to_level = num_pops_to_level
+        self.rng = np.random.default_rng(seed)
+
+        self.cells = np.zeros((num_boards, height, width), dtype=np.uint8)
+        self.points = np.zeros(num_boards, dtype=np.int64)
+        self.jellies_popped_stat = np.zeros(num_boards, dtype=np.int64)
+        self.level = np.ones(num_boards, dtype=np.int64)
+        self.max_chain = np.zeros(num_boards, dtype=np.int64)
+        self.game_over = np.zeros(num_boards, dtype=bool)
+
+        self.colors = self.get_random_colors(num_boards)
+        self.current_falling_groups = self.get_random_falling_groups(np.arange(num_boards))
+        self.next_falling_groups = self.get_random_falling_groups(np.arange(num_boards))
+
+    def get_random_colors(self, num_boards: int) -> np.ndarray:
+        """
+        Choose `self.num_colors` distinct jelly colors for each of `num_boards` boards.
+
+        Returns
+        -------
+        numpy.ndarray
+            A `(num_boards, num_colors)` array of jelly codes.
+        """
+
+        order = np.argsort(self.rng.random((num_boards, len(COLOR_CODES))), axis=1)
+        return COLOR_CODES[order[:, :self.num_colors]]
+
+    def get_random_falling_groups(self, boards: np.ndarray) -> np.ndarray:
+        """
+        Create a random falling group of two jellies for each board in `boards`.
+
+        Returns
+        -------
+        numpy.ndarray
+            A `(len(boards), 2)` array of jelly codes, ordered top then bottom when vertical.
+        """
+
+        choices = self.rng.integers(0, self.num_colors, size=(len(boards), 2))
+        return np.take_along_axis(self.colors[boards], choices, axis=1)
+
+    def reset(self, boards=None):
+        """
+        Clear boards and their scores to start new games on them.
+
+        Parameters
+        ----------
+        boards : numpy.ndarray, optional
+            The indices or boolean mask of the boards to reset. Every board is reset if not given.
+        """
+
+        if boards is None:
+            boards = np.arange(self.num_boards)
+        boards = np.arange(self.num_boards)[boards]
+
+        self.cells[boards] = EMPTY
+        self.points[boards] = 0
+        self.jellies_popped_stat[boards] = 0
+        self.level[boards] = 1
+        self.max_chain[boards] = 0
+        self.game_over[boards] = False
+        self.colors[boards] = self.get_random_colors(len(boards))
+        self.current_falling_groups[boards] = self.get_random_falling_groups(boards)
+        self.next_falling_groups[boards] = self.get_random_falling_groups(boards)
+
+    def get_column_heights(self) -> np.ndarray:
+        """
+        Count the jellies in every column, which is the stack height once the boards have settled.
+
+        Returns
+        -------
+        numpy.ndarray
+            A `(num_boards, width)` array of column heights.
+        """
+
+        return np.count_nonzero(self.cells, axis=1)
+
+    def place_falling_groups(self, columns: np.ndarray, orientations: np.ndarray):
+        """
+        Drop every active board's current falling group straight into its column and cycle the falling groups.
+
+        Parameters
+        ----------
+        columns : numpy.ndarray
+            The leftmost column of each board's falling group.
+
+        orientations : numpy.ndarray
+            0 to place the first jelly on top of the second, 1 to place the first jelly left of the second.
+
+        Notes
+        -----
+        Columns are clipped to the board, and a placement that doesn't fit ends that board's game.
+        """
+
+        boards = np.flatnonzero(~self.game_over)
+        horizontal = np.asarray(orientations)[boards] == 1
+        first_cols = np.clip(np.asarray(columns)[boards], 0, self.width - 1 - horizontal)
+        second_cols = first_cols + horizontal
+
+        heights = self.get_column_heights()[boards]
+        second_rows = self.height - 1 - heights[np.arange(len(boards)), second_cols]
+        first_rows = np.where(horizontal,
+                              self.height - 1 - heights[np.arange(len(boards)), first_cols],
+                              second_rows - 1)
+
+        fits = (first_rows >= 0) & (second_rows >= 0)
+        self.game_over[boards[~fits]] = True
+        boards, first_rows, first_cols, second_rows, second_cols = \
+            boards[fits], first_rows[fits], first_cols[fits], second_rows[fits], second_cols[fits]
+
+        groups = self.current_falling_groups[boards]
+        self.cells[boards, first_rows, first_cols] = groups[:, 0]
+        self.cells[boards, second_rows, second_cols] = groups[:, 1]
+
+        self.current_falling_groups[boards] = self.next_falling_groups[boards]
+        self.next_falling_groups[boards] = self.get_random_falling_groups(boards)
+
+    def apply_gravity(self, boards=None) -> np.ndarray:
+        """
+        Drop every jelly in the air to the ground, like `Board.settle` on every board.
+
+        Parameters
+        ----------
+        boards : numpy.ndarray, optional
+            The indices of the boards to settle. Every board is settled if not given.
+
+        Returns
+        -------
+        numpy.ndarray
+            Whether any jellies moved on each settled board.
+        """
+
+        cells = self.cells if boards is None else self.cells[boards]
+
+        # a stable sort of each column by emptiness moves the empty cells to the top without reordering jellies
+        order = np.argsort(cells != EMPTY, axis=1, kind='stable')
+        settled = np.take_along_axis(cells, order, axis=1)
+        moved = np.any(settled != cells, axis=(1, 2))
+
+        if boards is None:
+            self.cells[...] = settled
+        else:
+            self.cells[boards] = settled
+        return moved
+
+    def pop_jellies(self, boards=None) -> np.ndarray:
+        """
+        Pop every group of connected, same-colored jellies large enough to pop.
+
+        Parameters
+        ----------
+        boards : numpy.ndarray, optional
+            The indices of the boards to pop. Every board is popped if not given.
+
+        Returns
+        -------
+        numpy.ndarray
+            The number of jellies popped on each popped board.
+
+        Notes
+        -----
+        Groups are labeled by repeatedly spreading the largest cell label to same-colored neighbors
+        until no label changes, then sized with a single `bincount` over every board. Like `Board`, garbage
+        next to a popped jelly is cleared with it, without being counted.
+        """
+
+        cells = self.cells if boards is None else self.cells[boards]
+        num_boards = len(cells)
+        poppable = cells > GARBAGE
+
+        # every poppable cell starts with its own label, unique across all boards
+        labels = np.arange(1, cells.size + 1, dtype=np.int32).reshape(cells.shape)
+        labels *= poppable
+        same_vertical = ((cells[:, 1:, :] == cells[:, :-1, :]) & poppable[:, 1:, :]).astype(np.int32)
+        same_horizontal = ((cells[:, :, 1:] == cells[:, :, :-1]) & poppable[:, :, 1:]).astype(np.int32)
+        vertical_buffer = np.empty_like(same_vertical)
+        horizontal_buffer = np.empty_like(same_horizontal)
+
+        while True:
+            previous_labels = labels.copy()
+            np.multiply(labels[:, :-1, :], same_vertical, out=vertical_buffer)
+            np.maximum(labels[:, 1:, :], vertical_buffer, out=labels[:, 1:, :])
+            np.multiply(labels[:, 1:, :], same_vertical, out=vertical_buffer)
+            np.maximum(labels[:, :-1, :], vertical_buffer, out=labels[:, :-1, :])
+            np.multiply(labels[:, :, :-1], same_horizontal, out=horizontal_buffer)
+            np.maximum(labels[:, :, 1:], horizontal_buffer, out=labels[:, :, 1:])
+            np.multiply(labels[:, :, 1:], same_horizontal, out=horizontal_buffer)
+            np.maximum(labels[:, :, :-1], horizontal_buffer, out=labels[:, :, :-1])
+            if np.array_equal(labels, previous_labels):
+                break
+
+        group_sizes = np.bincount(labels.ravel(), minlength=cells.size + 1)
+        group_sizes[0] = 0
+        popped = group_sizes[labels] >= self.num_connecting_jellies_to_pop
+        num_popped = np.count_nonzero(popped.reshape(num_boards, -1), axis=1)
+
+        # clear the garbage next to popped jellies
+        cleared = popped.copy()
+        cleared[:, 1:, :] |= popped[:, :-1, :]
+        cleared[:, :-1, :] |= popped[:, 1:, :]
+        cleared[:, :, 1:] |= popped[:, :, :-1]
+        cleared[:, :, :-1] |= popped[:, :, 1:]
+        cleared &= popped | (cells == GARBAGE)
+
+        cells[cleared] = EMPTY
+        if boards is not None:
+            self.cells[boards] = cells
+        return num_popped
+
+    def resolve_chains(self) -> tuple:
+        """
+        Settle and pop every board until nothing is left to pop, scoring each chain like `GameEngine`.
+
+        Returns
+        -------
+        tuple
+            `(popped, chain)`: the number of jellies popped and the chain length on each board.
+
+        Notes
+        -----
+        After the first pass, only the boards that popped are settled and popped again.
+        """
+
+        total_jellies_popped = np.zeros(self.num_boards, dtype=np.int64)
+        popping_chain = np.full(self.num_boards, -1, dtype=np.int64)
+        chain = np.zeros(self.num_boards, dtype=np.int64)
+        resolving = np.flatnonzero(~self.game_over)
+
+        while len(resolving) > 0:
+            self.apply_gravity(resolving)
+            num_jellies_popped = self.pop_jellies(resolving)
+            total_jellies_popped[resolving] += num_jellies_popped
+            self.jellies_popped_stat[resolving] += num_jellies_popped
+            popping_chain[resolving] += 2
+
+            resolving = resolving[num_jellies_popped > 0]
+            chain[resolving] += 1
+
+            # level up and score the boards that popped, given to the player after every pop in a chain
+            leveled = resolving[self.jellies_popped_stat[resolving] >= self.num_pops_to_level * self.level[resolving]]
+            self.level[leveled] += 1
+            self.points[resolving] += total_jellies_popped[resolving] * popping_chain[resolving]
+
+        np.maximum(self.max_chain, chain, out=self.max_chain)
+        return total_jellies_popped, chain
+
+    def step(self, columns: np.ndarray, orientations: np.ndarray) -> tuple:
+        """
+        Place every active board's falling group and resolve the popping chains.
+
+        Parameters
+        ----------
+        columns : numpy.ndarray
+            The leftmost column of each board's falling group.
+
+        orientations : numpy.ndarray
+            0 to place the first jelly on top of the second, 1 to place the first jelly left of the second.
+
+        Returns
+        -------
+        tuple
+            `(popped, chain, points, game_over)` arrays, one entry per board.
+        """
+
+        self.place_falling_groups(columns, orientations)
+        num_jellies_popped, chain = self.resolve_chains()
+
+        # like `Board.add_falling_group_to_board`, a game is over once the spawn cells are blocked
+        spawn_col = (self.width - 1) // 2
+        self.game_over |= (self.cells[:, 0, spawn_col] != EMPTY) | (self.cells[:, 1, spawn_col] != EMPTY)
+
+        return num_jellies_popped, chain, self.points, self.game_over
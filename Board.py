@@ -1,6 +1,70 @@
 import random
+from collections import namedtuple
+from copy import copy
 
-from Jelly import Jelly, JellyBlock
+from Jelly import Jelly, JellyBlock, JELLY_CODES, CODE_JELLIES, EMPTY_JELLY, FALLING_FLAG
+
+EMPTY = JELLY_CODES[Jelly.EMPTY]
+GARBAGE = JELLY_CODES[Jelly.GARBAGE]
+
+# the positions of the set bits in every byte, for walking the cells of a bitboard a byte at a time
+BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+# the zobrist key slot of every cell code: the jelly code in the low three bits, and 8 more if it's falling
+CODE_SLOTS = bytes((code & 7) | (8 if code & FALLING_FLAG else 0) for code in range(256))
+NUM_CODE_SLOTS = 16
+
+# zobrist keys for every (cell, code slot) pair, shared by every board with the same number of cells
+ZOBRIST_KEYS = {}
+
+def get_zobrist_keys(num_cells: int) -> list:
+    """
+    Get the zobrist keys for a board with `num_cells` cells, indexed by `index << 4 | CODE_SLOTS[code]`.
+
+    Notes
+    -----
+    The keys come from a fixed seed, so the same board state hashes the same in every process.
+    Empty cells have a key of 0, so an empty board hashes to 0.
+    """
+
+    keys = ZOBRIST_KEYS.get(num_cells)
+    if keys is None:
+        key_random = random.Random(num_cells)
+        keys = [0 if slot == CODE_SLOTS[EMPTY] else key_random.getrandbits(64)
+                for _ in range(num_cells) for slot in range(NUM_CODE_SLOTS)]
+        ZOBRIST_KEYS[num_cells] = keys
+    return keys
+
+# the shape of a falling group in one orientation, as `(row, col)` offsets from its top left cell in falling group
+# list order, and the range of columns its leftmost jelly can be in
+FallingShape = namedtuple('FallingShape', ['offsets', 'min_col', 'max_col'])
+
+# the falling shapes for every (width, group size) pair, shared by every board with the same width
+PLACEMENT_TABLES = {}
+
+def get_placement_table(width: int, size: int) -> list:
+    """
+    Get the shape of a falling group of `size` jellies on a board `width` columns wide in every orientation.
+
+    Returns
+    -------
+    list
+        A `FallingShape` for each orientation. Orientation 0 is the shape groups spawn in, filling columns of two
+        jellies from top to bottom, then left to right. Groups of size 2 also have orientation 1, lying horizontally.
+    """
+
+    table = PLACEMENT_TABLES.get((width, size))
+    if table is None:
+        layouts = [tuple((index % 2, index // 2) for index in range(size))]
+        if size == 2:
+            layouts.append(((0, 0), (0, 1)))
+
+        table = []
+        for offsets in layouts:
+            shape_width = max(col for _, col in offsets) + 1
+            table.append(FallingShape(offsets, 0, width - shape_width))
+        PLACEMENT_TABLES[(width, size)] = table
+    return table
 
 class Board:
     """
@@ -10,7 +74,7 @@ class Board:
     ----------
     width : int, default: 6
         The width of the board.
-    
+
     height : int, default: 13
         The height of the board, with the top row being off-screen.
 
@@ -22,28 +86,410 @@ class Board:
 
     num_connecting_jellies_to_pop : int, default: 4
         The number of connected jellies required to pop.
+
+    seed : int, optional
+        The seed of the board's random number generator. A random seed is chosen if not given.
+
+    color_codes : list
+        The jelly codes of the board's colors, which falling groups are made from.
+
+    cells : bytearray or memoryview
+        The jelly code of every cell, indexed by `row * width + col`, with `FALLING_FLAG` set on falling jellies.
+        Pass a writable buffer of `width * height` bytes, such as a NumPy array, to store the cells in it instead
+        of a new bytearray. It is cleared, and stays the board's storage for as long as the board exists, so views
+        of it always show the board's current state.
+
+    color_masks : list
+        A bitboard for each jelly code, with bit `row * width + col` set where a non-falling jelly of that code is.
+
+    dirty_mask : int
+        A bitboard of the cells a non-falling jelly has been written into since the last `pop_jellies`.
+
+    column_tops : list
+        The row of the highest non-falling jelly in each column, or `height` if the column has none.
+
+    zobrist_hash : int
+        The 64-bit zobrist hash of `cells`, updated on every cell write.
+
+    journal : list
+        The `(index, old_code)` of every cell write since the oldest unreleased `snapshot`, or None if there isn't one.
     """
 
-    def __init__(self, 
-                 width=6, 
-                 height=13, 
-                 num_colors=4, 
-                 possible_sizes=[2],
-                 num_connecting_jellies_to_pop=4
+    def __init__(self,
+                 width=6,
+                 height=13,
+                 num_colors=4,
+                 possible_sizes=None,
+                 num_connecting_jellies_to_pop=4,
+                 seed=None,
+                 cells=None
                  ):
         self.width = width
         self.height = height
         self.num_colors = num_colors
-        self.possible_sizes = possible_sizes
+        self.possible_sizes = list(possible_sizes) if possible_sizes is not None else [2]
         self.num_connecting_jellies_to_pop = num_connecting_jellies_to_pop
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.random = random.Random(self.seed)
 
-        self.board = [[JellyBlock() for _ in range(width)] for _ in range(height)]
-        self.colors = random.sample(
+        if cells is None:
+            self.cells = bytearray(width * height)
+        else:
+            self.cells = memoryview(cells).cast('B')
+            if len(self.cells) != width * height:
+                raise ValueError("A board of " + str(width * height) + " cells can't be stored in " +
+                                 str(len(self.cells)) + " bytes")
+            self.cells[:] = bytes(width * height)
+        self.color_masks = [0] * len(CODE_JELLIES)
+        self.dirty_mask = 0
+        self.column_tops = [height] * width
+        self.zobrist_keys = get_zobrist_keys(width * height)
+        self.zobrist_hash = 0
+        self.journal = None
+        self.num_snapshots = 0
+
+        # bit masks used to shift a set of cells sideways without wrapping onto the next row
+        self._full_mask = (1 << (width * height)) - 1
+        left_col_mask = sum(1 << (row * width) for row in range(height))
+        self._not_left_col_mask = self._full_mask & ~left_col_mask
+        self._not_right_col_mask = self._full_mask & ~(left_col_mask << (width - 1))
+        self._column_masks = [left_col_mask << col for col in range(width)]
+        self._num_mask_bytes = (width * height + 7) // 8
+
+        # the codes of the jellies that can form groups, which is every color but not empty cells or garbage
+        self._group_codes = tuple(range(GARBAGE + 1, len(CODE_JELLIES)))
+
+        self.colors = self.random.sample(
             [Jelly.RED, Jelly.GREEN, Jelly.BLUE, Jelly.PURPLE, Jelly.YELLOW],
             num_colors)
+        self.color_codes = [JELLY_CODES[color] for color in self.colors]
         self.current_falling_group = self.get_random_jelly_falling_group()
         self.next_falling_group = self.get_random_jelly_falling_group()
 
+    @property
+    def board(self) -> list:
+        """
+        A grid of `JellyBlock` views of the board, built on request for the GUI.
+
+        Returns
+        -------
+        list
+            The rows of the board, each a list of `JellyBlock`.
+
+        Notes
+        -----
+        The views are copies, so changing them does not change the board. Every empty cell is the
+        shared, unchangeable `EMPTY_JELLY`.
+        """
+
+        return [[self.get_jelly(row, col) for col in range(self.width)] for row in range(self.height)]
+
+    def get_jelly(self, row: int, col: int) -> JellyBlock:
+        """
+        Create a `JellyBlock` view of a single cell.
+
+        Parameters
+        ----------
+        row : int
+            The row of the cell.
+
+        col : int
+            The column of the cell.
+
+        Returns
+        -------
+        JellyBlock
+            The jelly in the cell.
+        """
+
+        code = self.cells[row * self.width + col]
+        if code == EMPTY:
+            return EMPTY_JELLY
+        return JellyBlock.from_code(code & ~FALLING_FLAG, code & FALLING_FLAG != 0, row, col)
+
+    def state_hash(self) -> int:
+        """
+        Get the zobrist hash of the board's cells, including the falling group on the board, in O(1).
+
+        Returns
+        -------
+        int
+            The 64-bit hash.
+
+        Notes
+        -----
+        The next falling group isn't on the board, so it isn't part of the hash.
+        """
+
+        return self.zobrist_hash
+
+    def snapshot(self, save_random=False) -> tuple:
+        """
+        Start recording changes so the board can be put back the way it is now with `restore`.
+
+        Parameters
+        ----------
+        save_random : bool, default: False
+            Whether to also save the random number generator, which is only needed if
+            `cycle_falling_groups` will be called before restoring.
+
+        Returns
+        -------
+        tuple
+            The snapshot, to pass to `restore` or `release`.
+
+        Notes
+        -----
+        Only the cells written after the snapshot are recorded, so taking and restoring a snapshot
+        costs in proportion to the change rather than the board size. Snapshots can be nested, and must
+        be restored or released newest first.
+        """
+
+        if self.journal is None:
+            self.journal = []
+        self.num_snapshots += 1
+
+        return (len(self.journal),
+                self.dirty_mask,
+                self.current_falling_group,
+                self.next_falling_group,
+                [(jelly, jelly.falling, jelly.row, jelly.col)
+                 for jelly in self.current_falling_group + self.next_falling_group],
+                self.random.getstate() if save_random else None)
+
+    def restore(self, snapshot: tuple):
+        """
+        Undo every change made since `snapshot` was taken, and release it.
+
+        Parameters
+        ----------
+        snapshot : tuple
+            A snapshot from `snapshot`.
+        """
+
+        journal_length, dirty_mask, current_falling_group, next_falling_group, jellies, random_state = snapshot
+
+        # undo the cell writes newest first, without recording the undoing writes
+        journal = self.journal
+        self.journal = None
+        while len(journal) > journal_length:
+            index, code = journal.pop()
+            self._set_cell(index, code)
+        self.journal = journal
+
+        self.dirty_mask = dirty_mask
+        self.current_falling_group = current_falling_group
+        self.next_falling_group = next_falling_group
+        num_current_jellies = len(current_falling_group)
+        current_falling_group[:] = [jelly for jelly, _, _, _ in jellies[:num_current_jellies]]
+        next_falling_group[:] = [jelly for jelly, _, _, _ in jellies[num_current_jellies:]]
+        for jelly, falling, row, col in jellies:
+            jelly.falling = falling
+            jelly.row = row
+            jelly.col = col
+        if random_state is not None:
+            self.random.setstate(random_state)
+
+        self.release(snapshot)
+
+    def release(self, snapshot: tuple):
+        """
+        Keep every change made since `snapshot` was taken, and stop recording changes if it was the oldest snapshot.
+
+        Parameters
+        ----------
+        snapshot : tuple
+            A snapshot from `snapshot`.
+        """
+
+        self.num_snapshots -= 1
+        if self.num_snapshots == 0:
+            self.journal = None
+
+    def copy(self) -> "Board":
+        """
+        Create a copy of the board and its falling groups.
+
+        Returns
+        -------
+        Board
+            The copy.
+
+        Notes
+        -----
+        The copy shares this board's random number generator, so cycling falling groups on either
+        board changes the falling groups the other one will get.
+        """
+
+        board = copy(self)
+        board.cells = bytearray(self.cells)
+        board.color_masks = list(self.color_masks)
+        board.column_tops = list(self.column_tops)
+        board.journal = None
+        board.num_snapshots = 0
+        board.current_falling_group = [JellyBlock.from_code(jelly.code, jelly.falling, jelly.row, jelly.col)
+                                       for jelly in self.current_falling_group]
+        board.next_falling_group = [JellyBlock.from_code(jelly.code, jelly.falling, jelly.row, jelly.col)
+                                    for jelly in self.next_falling_group]
+        return board
+
+    def _set_cell(self, index: int, code: int):
+        """
+        Write a jelly code into a cell. Every change to `self.cells` goes through here or `_clear_cells`.
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell, `row * width + col`.
+
+        code : int
+            The jelly code to write.
+        """
+
+        old_code = self.cells[index]
+        if self.journal is not None:
+            self.journal.append((index, old_code))
+        self.zobrist_hash ^= self.zobrist_keys[index << 4 | CODE_SLOTS[old_code]] ^ \
+                            self.zobrist_keys[index << 4 | CODE_SLOTS[code]]
+        self.cells[index] = code
+
+        if old_code != EMPTY and not old_code & FALLING_FLAG:
+            self.color_masks[old_code] &= ~(1 << index)
+            row, col = divmod(index, self.width)
+            if row == self.column_tops[col]:
+                self.column_tops[col] = self._find_column_top(row, col)
+        if code != EMPTY and not code & FALLING_FLAG:
+            self.color_masks[code] |= 1 << index
+            self.dirty_mask |= 1 << index
+            row, col = divmod(index, self.width)
+            if row < self.column_tops[col]:
+                self.column_tops[col] = row
+
+    def _clear_cells(self, mask: int):
+        """
+        Empty every cell in a bitboard of non-falling jellies, the bulk counterpart of `_set_cell`.
+
+        Parameters
+        ----------
+        mask : int
+            The bitboard of cells to empty.
+        """
+
+        color_masks = self.color_masks
+        occupied_mask = 0
+        for code in range(len(color_masks)):
+            color_masks[code] &= ~mask
+            occupied_mask |= color_masks[code]
+
+        cells = self.cells
+        zobrist_keys = self.zobrist_keys
+        zobrist_hash = self.zobrist_hash
+        journal = self.journal
+        for byte_index, byte in enumerate(mask.to_bytes(self._num_mask_bytes, 'little')):
+            if not byte:
+                continue
+            first_index = byte_index << 3
+            for bit in BYTE_BITS[byte]:
+                index = first_index + bit
+                code = cells[index]
+                if journal is not None:
+                    journal.append((index, code))
+                zobrist_hash ^= zobrist_keys[index << 4 | CODE_SLOTS[code]]
+                cells[index] = EMPTY
+        self.zobrist_hash = zobrist_hash
+
+        # a column whose top jelly was cleared has its new top at its highest jelly left
+        width = self.width
+        column_tops = self.column_tops
+        for col in range(width):
+            if mask >> (column_tops[col] * width + col) & 1:
+                column = occupied_mask & self._column_masks[col]
+                column_tops[col] = ((column & -column).bit_length() - 1) // width if column else self.height
+
+    def _find_column_top(self, row: int, col: int) -> int:
+        """
+        Find the highest non-falling jelly in a column at or below `row`.
+
+        Returns
+        -------
+        int
+            The row of the jelly, or `height` if there is none.
+        """
+
+        while row < self.height and not self._is_blocked(row, col):
+            row += 1
+        return row
+
+    def _get_neighbors(self, mask: int) -> int:
+        """
+        Get the bitboard of every cell orthogonally adjacent to a cell in `mask`.
+        """
+
+        return ((mask << 1) & self._not_left_col_mask) | \
+               ((mask >> 1) & self._not_right_col_mask) | \
+               ((mask << self.width) & self._full_mask) | \
+               (mask >> self.width)
+
+    def get_connected_group(self, seed: int, mask: int) -> int:
+        """
+        Grow `seed` through adjacent cells of `mask` until it covers its whole connected group.
+
+        Parameters
+        ----------
+        seed : int
+            The bitboard to start from, a subset of `mask`.
+
+        mask : int
+            The bitboard of cells the group can spread into.
+
+        Returns
+        -------
+        int
+            The bitboard of the connected group.
+        """
+
+        group = seed
+        while True:
+            grown = (group | self._get_neighbors(group)) & mask
+            if grown == group:
+                return group
+            group = grown
+
+    def _move_falling_jelly(self, jelly: JellyBlock, row: int, col: int):
+        """
+        Write a falling jelly into a new cell and update its position, without clearing its old cell.
+
+        Parameters
+        ----------
+        jelly : JellyBlock
+            The falling jelly to move.
+
+        row : int
+            The new row of the jelly.
+
+        col : int
+            The new column of the jelly.
+        """
+
+        self._set_cell(row * self.width + col, jelly.code | FALLING_FLAG)
+        jelly.row = row
+        jelly.col = col
+
+    def _is_blocked(self, row: int, col: int) -> bool:
+        """
+        Whether a cell holds a jelly that isn't falling.
+        """
+
+        code = self.cells[row * self.width + col]
+        return code != EMPTY and not code & FALLING_FLAG
+
+    def _is_empty(self, row: int, col: int) -> bool:
+        """
+        Whether a cell holds no jelly.
+        """
+
+        return self.cells[row * self.width + col] == EMPTY
+
     def get_random_jelly_falling_group(self):
         """
         Create a random jelly falling group based on `self.num_colors` and `self.possible_sizes`.
@@ -54,11 +500,11 @@ class Board:
             The random falling group.
         """
 
-        falling_group = [JellyBlock(falling=True) for _ in range(random.choice(self.possible_sizes))]
+        falling_group = [JellyBlock.from_code(EMPTY, True) for _ in range(self.random.choice(self.possible_sizes))]
         for jelly in falling_group:
-            jelly.color = random.choice(self.colors)
+            jelly.code = self.random.choice(self.color_codes)
         return falling_group
-    
+
     def add_falling_group_to_board(self) -> bool:
         """
         Insert the current falling group in the top of the board, replace it with the next falling group,
@@ -68,30 +514,71 @@ class Board:
         -------
         bool
             Whether there was space for the falling group.
-        
+
         Notes
         -----
         The falling group list is ordered from left to right, then up to down.
         Ex. A falling group has four jellies with (row, col) coordinates: [(0, 0), (1, 0), (0, 1), (1, 1)].
         """
 
-        row = 0
         col = (self.width - 1) // 2
-        for jelly in self.current_falling_group:
-            if self.board[row][col].color != Jelly.EMPTY:
+        spawn_shape = get_placement_table(self.width, len(self.current_falling_group))[0]
+        for jelly, (row_offset, col_offset) in zip(self.current_falling_group, spawn_shape.offsets):
+            if not self._is_empty(row_offset, col + col_offset):
                 return False
-            jelly.row = row
-            jelly.col = col
-            self.board[row][col] = jelly
-            row += 1
-
-            # if the third row is reached, wrap and add to the next col instead
-            if row >= 2:
-                row = 0
-                col += 1
+            self._move_falling_jelly(jelly, row_offset, col + col_offset)
 
         return True
 
+    def get_falling_shape(self) -> FallingShape:
+        """
+        Get the shape of the current falling group from the placement table.
+        """
+
+        shapes = get_placement_table(self.width, len(self.current_falling_group))
+        if len(self.current_falling_group) == 2 and \
+           self.current_falling_group[0].row == self.current_falling_group[1].row:
+            return shapes[1]
+        return shapes[0]
+
+    def get_reachable_cols(self) -> tuple:
+        """
+        Find how far the falling group could be moved sideways from where it is.
+
+        Returns
+        -------
+        tuple
+            `(min_col, max_col)`: the range of columns the falling group's leftmost jelly could be moved to by
+            repeatedly moving it left or right.
+        """
+
+        shape = self.get_falling_shape()
+        anchor_col = self.current_falling_group[0].col
+
+        min_col = anchor_col
+        while min_col > shape.min_col and \
+              not any(self._is_blocked(jelly.row, jelly.col + min_col - 1 - anchor_col)
+                      for jelly in self.current_falling_group):
+            min_col -= 1
+
+        max_col = anchor_col
+        while max_col < shape.max_col and \
+              not any(self._is_blocked(jelly.row, jelly.col + max_col + 1 - anchor_col)
+                      for jelly in self.current_falling_group):
+            max_col += 1
+
+        return min_col, max_col
+
+    def _shift_falling_group(self, num_rows: int, num_cols: int):
+        """
+        Move the falling group by any number of rows and columns in one write per cell, without checking for space.
+        """
+
+        for jelly in self.current_falling_group:
+            self._set_cell(jelly.row * self.width + jelly.col, EMPTY)
+        for jelly in self.current_falling_group:
+            self._move_falling_jelly(jelly, jelly.row + num_rows, jelly.col + num_cols)
+
     def move_falling_group_left(self):
         """
         If there is space for the falling group leftwards, move the falling group left.
@@ -102,20 +589,19 @@ class Board:
         are listed in order from left to right.
         """
 
-        is_space_to_move = True
+        # the placement table has the range of columns the leftmost jelly can be in
+        if self.current_falling_group[0].col <= self.get_falling_shape().min_col:
+            return
+
         for jelly in self.current_falling_group:
 
             # if there is either a blank space or a falling jelly to the left, there is space for this jelly
-            if jelly.col == 0 or (self.board[jelly.row][jelly.col - 1].color != Jelly.EMPTY and \
-               not self.board[jelly.row][jelly.col - 1].falling):
-                is_space_to_move = False
-                break
-        
-        if is_space_to_move:
-            for jelly in self.current_falling_group:
-                self.board[jelly.row][jelly.col - 1] = jelly
-                self.board[jelly.row][jelly.col] = JellyBlock()
-                jelly.col -= 1
+            if self._is_blocked(jelly.row, jelly.col - 1):
+                return
+
+        for jelly in self.current_falling_group:
+            self._move_falling_jelly(jelly, jelly.row, jelly.col - 1)
+            self._set_cell(jelly.row * self.width + jelly.col + 1, EMPTY)
 
     def move_falling_group_right(self):
         """
@@ -127,20 +613,19 @@ class Board:
         are listed in order from left to right.
         """
 
-        is_space_to_move = True
+        # the placement table has the range of columns the leftmost jelly can be in
+        if self.current_falling_group[0].col >= self.get_falling_shape().max_col:
+            return
+
         for jelly in reversed(self.current_falling_group):
 
             # if there is either a blank space or a falling jelly to the right, there is space for this jelly
-            if jelly.col == self.width - 1 or (self.board[jelly.row][jelly.col + 1].color != Jelly.EMPTY and \
-                not self.board[jelly.row][jelly.col + 1].falling):
-                is_space_to_move = False
-                break
-        
-        if is_space_to_move:
-            for jelly in reversed(self.current_falling_group):
-                self.board[jelly.row][jelly.col + 1] = jelly
-                self.board[jelly.row][jelly.col] = JellyBlock()
-                jelly.col += 1
+            if self._is_blocked(jelly.row, jelly.col + 1):
+                return
+
+        for jelly in reversed(self.current_falling_group):
+            self._move_falling_jelly(jelly, jelly.row, jelly.col + 1)
+            self._set_cell(jelly.row * self.width + jelly.col - 1, EMPTY)
 
     def rotate_falling_group_left(self):
         """
@@ -155,39 +640,35 @@ class Board:
 
         if len(self.current_falling_group) == 1:
             return
-        
+
         if len(self.current_falling_group) == 2:
-            
+            first, second = self.current_falling_group
+
             # if the jellies are vertical, move the top one to the left of the bottom
-            if self.current_falling_group[0].row != self.current_falling_group[1].row and \
-               self.current_falling_group[0].col > 0 and \
-               self.board[self.current_falling_group[0].row][self.current_falling_group[0].col - 1].color == Jelly.EMPTY and \
-               self.board[self.current_falling_group[0].row + 1][self.current_falling_group[0].col - 1].color == Jelly.EMPTY:
+            if first.row != second.row and \
+               first.col > 0 and \
+               self._is_empty(first.row, first.col - 1) and \
+               self._is_empty(first.row + 1, first.col - 1):
 
                 # move the first jelly
-                self.board[self.current_falling_group[0].row + 1][self.current_falling_group[0].col - 1] = self.current_falling_group[0]
-                self.board[self.current_falling_group[0].row][self.current_falling_group[0].col] = JellyBlock()
-                self.current_falling_group[0].row += 1
-                self.current_falling_group[0].col -= 1
+                self._set_cell(first.row * self.width + first.col, EMPTY)
+                self._move_falling_jelly(first, first.row + 1, first.col - 1)
 
             # if the jellies are horizontal, move the right one up and the left one right
-            elif self.current_falling_group[0].col != self.current_falling_group[1].col and \
-               self.current_falling_group[0].row > 0 and \
-               self.board[self.current_falling_group[0].row - 1][self.current_falling_group[0].col].color == Jelly.EMPTY:
-                
+            elif first.col != second.col and \
+               first.row > 0 and \
+               self._is_empty(first.row - 1, first.col):
+
                 # move the second jelly
-                self.board[self.current_falling_group[1].row - 1][self.current_falling_group[1].col] = self.current_falling_group[1]
-                self.current_falling_group[1].row -= 1
+                self._move_falling_jelly(second, second.row - 1, second.col)
 
                 # move the first jelly
-                self.board[self.current_falling_group[0].row][self.current_falling_group[0].col + 1] = self.current_falling_group[0]
-                self.board[self.current_falling_group[0].row][self.current_falling_group[0].col] = JellyBlock()
-                self.current_falling_group[0].col += 1
+                self._move_falling_jelly(first, first.row, first.col + 1)
+                self._set_cell(first.row * self.width + first.col - 1, EMPTY)
 
                 # swap the positions of the jellies in the falling group list to maintain left-right, up-down order
-                temp = self.current_falling_group[0]
-                self.current_falling_group[0] = self.current_falling_group[1]
-                self.current_falling_group[1] = temp
+                self.current_falling_group[0] = second
+                self.current_falling_group[1] = first
         else:
             # TODO
             pass
@@ -205,39 +686,35 @@ class Board:
 
         if len(self.current_falling_group) == 1:
             return
-        
+
         if len(self.current_falling_group) == 2:
-            
+            first, second = self.current_falling_group
+
             # if the jellies are vertical, move the top one to the right of the bottom
-            if self.current_falling_group[0].row != self.current_falling_group[1].row and \
-               self.current_falling_group[0].col < self.width - 1 and \
-               self.board[self.current_falling_group[0].row][self.current_falling_group[0].col + 1].color == Jelly.EMPTY and \
-               self.board[self.current_falling_group[0].row + 1][self.current_falling_group[0].col + 1].color == Jelly.EMPTY:
+            if first.row != second.row and \
+               first.col < self.width - 1 and \
+               self._is_empty(first.row, first.col + 1) and \
+               self._is_empty(first.row + 1, first.col + 1):
 
                 # move the first jelly
-                self.board[self.current_falling_group[0].row + 1][self.current_falling_group[0].col + 1] = self.current_falling_group[0]
-                self.board[self.current_falling_group[0].row][self.current_falling_group[0].col] = JellyBlock()
-                self.current_falling_group[0].row += 1
-                self.current_falling_group[0].col += 1
+                self._set_cell(first.row * self.width + first.col, EMPTY)
+                self._move_falling_jelly(first, first.row + 1, first.col + 1)
 
                 # swap the positions of the jellies in the falling group list to maintain left-right, up-down order
-                temp = self.current_falling_group[0]
-                self.current_falling_group[0] = self.current_falling_group[1]
-                self.current_falling_group[1] = temp
+                self.current_falling_group[0] = second
+                self.current_falling_group[1] = first
 
             # if the jellies are horizontal, move the left one up and the right one left
-            elif self.current_falling_group[0].col != self.current_falling_group[1].col and \
-               self.current_falling_group[0].row > 0 and \
-               self.board[self.current_falling_group[0].row - 1][self.current_falling_group[0].col].color == Jelly.EMPTY:
-                
+            elif first.col != second.col and \
+               first.row > 0 and \
+               self._is_empty(first.row - 1, first.col):
+
                 # move the first jelly
-                self.board[self.current_falling_group[0].row - 1][self.current_falling_group[0].col] = self.current_falling_group[0]
-                self.current_falling_group[0].row -= 1
+                self._move_falling_jelly(first, first.row - 1, first.col)
 
                 # move the second jelly
-                self.board[self.current_falling_group[1].row][self.current_falling_group[1].col - 1] = self.current_falling_group[1]
-                self.board[self.current_falling_group[1].row][self.current_falling_group[1].col] = JellyBlock()
-                self.current_falling_group[1].col -= 1
+                self._move_falling_jelly(second, second.row, second.col - 1)
+                self._set_cell(second.row * self.width + second.col + 1, EMPTY)
         else:
             # TODO
             pass
@@ -255,18 +732,25 @@ class Board:
         # if there is ground or a non-falling jelly below any of the jellies, it can't move down
         can_move_down = True
         for jelly in reversed(self.current_falling_group):
-            if jelly.row == self.height - 1 or (not self.board[jelly.row + 1][jelly.col].falling and \
-               self.board[jelly.row + 1][jelly.col].color != Jelly.EMPTY):
+            if jelly.row == self.height - 1 or self._is_blocked(jelly.row + 1, jelly.col):
                 can_move_down = False
-        
+
         if can_move_down:
             for jelly in reversed(self.current_falling_group):
-                self.board[jelly.row + 1][jelly.col] = jelly
-                self.board[jelly.row][jelly.col] = JellyBlock()
-                jelly.row += 1
+                self._move_falling_jelly(jelly, jelly.row + 1, jelly.col)
+                self._set_cell((jelly.row - 1) * self.width + jelly.col, EMPTY)
 
         return can_move_down
-    
+
+    def place_falling_group(self):
+        """
+        Place the current falling group where it is, so it no longer falls.
+        """
+
+        for jelly in self.current_falling_group:
+            jelly.falling = False
+            self._set_cell(jelly.row * self.width + jelly.col, jelly.code)
+
     def cycle_falling_groups(self) -> bool:
         """
         Place the current falling group, cycle the next falling group, and replace that next falling group.
@@ -276,11 +760,9 @@ class Board:
         bool
             Whether there was space to place the falling group or not
         """
-        
-        # place the current falling group
-        for jelly in self.current_falling_group:
-            jelly.falling = False
-        
+
+        self.place_falling_group()
+
         # set the current equal to the next, get a new next, and add the next to the board
         self.current_falling_group = self.next_falling_group
         self.next_falling_group = self.get_random_jelly_falling_group()
@@ -288,77 +770,128 @@ class Board:
 
     def pop_jellies(self) -> int:
         """
-        Iterate through the board to find jellies needing popping and return the number of jellies popped.
+        Find every group of connected, same-colored jellies large enough to pop, pop them,
+        and return the number of jellies popped.
 
         Returns
         -------
         int
             The number of jellies popped.
+
+        Notes
+        -----
+        Instead of searching one group at a time, every jelly is sorted with shifts over whole bitboards at once,
+        by how many same-colored neighbors it has. A group of at least three has a jelly with two or more, and a
+        group of at least four has a jelly with three or more or two such jellies side by side. Every jelly in the
+        group is one of those jellies or next to one, so every jelly to pop is found without a flood fill when
+        `num_connecting_jellies_to_pop` is at most 4. For larger groups, only the groups of at least four with a
+        jelly in `self.dirty_mask` are flood filled, because every other group was already too small to pop the
+        last time this ran.
+
+        The neighbors are only ever followed between jellies of the same color, so every color is sorted together.
+        Falling and garbage jellies are never part of a group, but garbage next to a popped jelly is cleared
+        with it, without being counted.
         """
 
-        num_jellies_popped = 0
+        dirty_mask = self.dirty_mask
+        if not dirty_mask:
+            return 0
+
+        width = self.width
+        num_connecting_jellies_to_pop = self.num_connecting_jellies_to_pop
+        color_masks = self.color_masks
+
+        # the jellies whose right and lower neighbors have the same color, then those whose left and upper do
+        right = 0
+        down = 0
+        for code in self._group_codes:
+            color_mask = color_masks[code]
+            right |= (color_mask >> 1) & color_mask
+            down |= (color_mask >> width) & color_mask
+        right &= self._not_right_col_mask
+        left = right << 1
+        up = down << width
+        horizontal = left | right
+        vertical = up | down
+
+        if num_connecting_jellies_to_pop <= 1:
+            popped_mask = 0
+            for code in self._group_codes:
+                popped_mask |= color_masks[code]
+        elif num_connecting_jellies_to_pop == 2:
+            popped_mask = horizontal | vertical
+        else:
+            # the jellies with at least two same-colored neighbors, which are in groups of at least three
+            branching = (left & right) | (horizontal & vertical) | (up & down)
+            if num_connecting_jellies_to_pop == 3:
+                popped_mask = branching | ((branching & right) << 1) | ((branching & left) >> 1) | \
+                              ((branching & down) << width) | ((branching & up) >> width)
+            else:
+                # the jellies with three or more same-colored neighbors or next to a same-colored jelly with two
+                # or more, which are in groups of at least four, and then every same-colored neighbor of theirs
+                core = (left & right & vertical) | (up & down & horizontal) | \
+                       (branching & ((left & (branching << 1)) | (right & (branching >> 1)) |
+                                     (up & (branching << width)) | (down & (branching >> width))))
+                popped_mask = core | ((core & right) << 1) | ((core & left) >> 1) | \
+                              ((core & down) << width) | ((core & up) >> width)
+
+                if num_connecting_jellies_to_pop > 4:
+                    group_mask = popped_mask
+                    popped_mask = 0
+                    remaining = group_mask & dirty_mask
+                    while remaining:
+                        group = frontier = remaining & -remaining
+                        while frontier:
+                            frontier = (((frontier & right) << 1) | ((frontier & left) >> 1) |
+                                        ((frontier & down) << width) | ((frontier & up) >> width)) & ~group
+                            group |= frontier
+                        remaining &= ~group
+
+                        # if the number of connected jellies is enough to pop, mark them
+                        if group.bit_count() >= num_connecting_jellies_to_pop:
+                            popped_mask |= group
+
+        self.dirty_mask = 0
+        if not popped_mask:
+            return 0
+
+        num_jellies_popped = popped_mask.bit_count()
+        popped_mask |= self._get_neighbors(popped_mask) & color_masks[GARBAGE]
+        self._clear_cells(popped_mask)
+        return num_jellies_popped
 
-        # explore every path from each jelly using pseudo-BFS
-        total_visited_jellies = {}
-        for row in self.board:
-            for jelly in row:
+    def add_garbage(self, num_jellies: int, rng=None) -> int:
+        """
+        Drop garbage onto the tops of the columns: a full row of it for every `width` jellies,
+        then one in each of a random set of columns for the rest.
 
-                # if the jelly is empty, garbage, falling, or visited already, continue
-                if jelly.color == Jelly.EMPTY or jelly.color == Jelly.GARBAGE or \
-                   jelly.falling or total_visited_jellies.get(jelly, False):
-                    continue
+        Parameters
+        ----------
+        num_jellies : int
+            The number of garbage jellies to drop.
 
-                jelly_queue = [jelly]
-                visited_jellies = [jelly]
-                total_visited_jellies[jelly] = True
-
-                while len(jelly_queue) > 0:
-                    adj_jelly = jelly_queue.pop(0)
-
-                    # add all adjacent, same-colored, unvisited jellies to the list to visit
-                    if adj_jelly.row > 0 and \
-                       self.board[adj_jelly.row - 1][adj_jelly.col].color != Jelly.EMPTY and \
-                       self.board[adj_jelly.row - 1][adj_jelly.col].color != Jelly.GARBAGE and \
-                       not total_visited_jellies.get(self.board[adj_jelly.row - 1][adj_jelly.col], False) and \
-                       adj_jelly.color == self.board[adj_jelly.row - 1][adj_jelly.col].color:
-                        jelly_queue.append(self.board[adj_jelly.row - 1][adj_jelly.col])
-                        visited_jellies.append(self.board[adj_jelly.row - 1][adj_jelly.col])
-                        total_visited_jellies[self.board[adj_jelly.row - 1][adj_jelly.col]] = True
-
-                    if adj_jelly.row < self.height - 1 and \
-                       self.board[adj_jelly.row + 1][adj_jelly.col].color != Jelly.EMPTY and \
-                       self.board[adj_jelly.row + 1][adj_jelly.col].color != Jelly.GARBAGE and \
-                       not total_visited_jellies.get(self.board[adj_jelly.row + 1][adj_jelly.col], False) and \
-                       adj_jelly.color == self.board[adj_jelly.row + 1][adj_jelly.col].color:
-                        jelly_queue.append(self.board[adj_jelly.row + 1][adj_jelly.col])
-                        visited_jellies.append(self.board[adj_jelly.row + 1][adj_jelly.col])
-                        total_visited_jellies[self.board[adj_jelly.row + 1][adj_jelly.col]] = True
-
-                    if adj_jelly.col > 0 and \
-                       self.board[adj_jelly.row][adj_jelly.col - 1].color != Jelly.EMPTY and \
-                       self.board[adj_jelly.row][adj_jelly.col - 1].color != Jelly.GARBAGE and \
-                       not total_visited_jellies.get(self.board[adj_jelly.row][adj_jelly.col - 1], False) and \
-                       adj_jelly.color == self.board[adj_jelly.row][adj_jelly.col - 1].color:
-                        jelly_queue.append(self.board[adj_jelly.row][adj_jelly.col - 1])
-                        visited_jellies.append(self.board[adj_jelly.row][adj_jelly.col - 1])
-                        total_visited_jellies[self.board[adj_jelly.row][adj_jelly.col - 1]] = True
-
-                    if adj_jelly.col < self.width - 1 and \
-                       self.board[adj_jelly.row][adj_jelly.col + 1].color != Jelly.EMPTY and \
-                       self.board[adj_jelly.row][adj_jelly.col + 1].color != Jelly.GARBAGE and \
-                       not total_visited_jellies.get(self.board[adj_jelly.row][adj_jelly.col + 1], False) and \
-                       adj_jelly.color == self.board[adj_jelly.row][adj_jelly.col + 1].color:
-                        jelly_queue.append(self.board[adj_jelly.row][adj_jelly.col + 1])
-                        visited_jellies.append(self.board[adj_jelly.row][adj_jelly.col + 1])
-                        total_visited_jellies[self.board[adj_jelly.row][adj_jelly.col + 1]] = True
-                    
-                # if the number of connected jellies is enough to pop, pop them
-                if len(visited_jellies) >= self.num_connecting_jellies_to_pop:
-                    num_jellies_popped += len(visited_jellies)
-                    for jelly_to_pop in visited_jellies:
-                        self.board[jelly_to_pop.row][jelly_to_pop.col] = JellyBlock()
+        rng : random.Random, optional
+            The random number generator choosing the columns of the last, partial row. Defaults to `self.random`.
 
-        return num_jellies_popped
+        Returns
+        -------
+        int
+            The number of garbage jellies that fit. Garbage landing on a falling jelly or above the top row is lost.
+        """
+
+        num_rows, num_extra_jellies = divmod(num_jellies, self.width)
+        cols = list(range(self.width)) * num_rows
+        if num_extra_jellies > 0:
+            cols += (rng if rng is not None else self.random).sample(range(self.width), num_extra_jellies)
+
+        num_jellies_added = 0
+        for col in cols:
+            row = self.column_tops[col] - 1
+            if row >= 0 and self.cells[row * self.width + col] == EMPTY:
+                self._set_cell(row * self.width + col, GARBAGE)
+                num_jellies_added += 1
+
+        return num_jellies_added
 
     def apply_gravity(self) -> bool:
         """
@@ -370,21 +903,96 @@ class Board:
             Whether any jellies were actually moved downward.
         """
 
+        width = self.width
+        cells = self.cells
         board_changed = False
-        for row in reversed(range(len(self.board) - 1)):
-            for col in range(len(self.board[row])):
+        for index in reversed(range(len(cells) - width)):
+            code = cells[index]
 
-                # if the jelly isn't falling and isn't on another jelly, move it down by 1
-                if self.board[row][col].color != Jelly.EMPTY and not self.board[row][col].falling \
-                    and self.board[row + 1][col].color == Jelly.EMPTY:
-                    self.board[row + 1][col] = self.board[row][col]
-                    self.board[row + 1][col].row += 1
-                    self.board[row][col] = JellyBlock()
-                    board_changed = True
+            # if the jelly isn't falling and isn't on another jelly, move it down by 1
+            if code != EMPTY and not code & FALLING_FLAG and cells[index + width] == EMPTY:
+                self._set_cell(index + width, code)
+                self._set_cell(index, EMPTY)
+                board_changed = True
 
         return board_changed
 
+    def settle(self) -> list:
+        """
+        Drop every jelly in the air to the ground in one pass, the same result as calling `apply_gravity`
+        until it returns False.
+
+        Returns
+        -------
+        list
+            A `(row, col, distance)` tuple for every jelly that fell, where `row` is the row it fell from.
+            The list is ordered by column, then bottom to top, so animations can be replayed from it.
+        """
+
+        width = self.width
+        cells = self.cells
+        fall_distances = []
+        for col in range(width):
+
+            # compact each column downwards, treating falling jellies as part of the ground
+            landing_row = self.height - 1
+            for row in reversed(range(self.height)):
+                code = cells[row * width + col]
+                if code == EMPTY:
+                    continue
+                if code & FALLING_FLAG:
+                    landing_row = row - 1
+                    continue
+                if landing_row != row:
+                    self._set_cell(landing_row * width + col, code)
+                    self._set_cell(row * width + col, EMPTY)
+                    fall_distances.append((row, col, landing_row - row))
+                landing_row -= 1
+
+        return fall_distances
+
+    def get_drop_distance(self) -> int:
+        """
+        Find how many rows the falling group can fall before it lands, using `self.column_tops`.
+
+        Returns
+        -------
+        int
+            The number of rows.
+        """
+
+        distance = self.height
+        for jelly in self.current_falling_group:
+            landing_row = self.column_tops[jelly.col] - 1
+
+            # a jelly still in the air above the falling group doesn't block it, so look below the group instead
+            if landing_row < jelly.row:
+                landing_row = self._find_column_top(jelly.row + 1, jelly.col) - 1
+            distance = min(distance, landing_row - jelly.row)
+
+        return distance
+
     def hard_drop(self):
         """
         Drop the falling group to the ground immediately
-        """
\ No newline at end of file
+        """
+
+        distance = self.get_drop_distance()
+        if distance > 0:
+            self._shift_falling_group(distance, 0)
+
+    def drop_falling_group_at(self, col: int):
+        """
+        Move the falling group sideways so its leftmost jelly is in `col`, then hard drop it, without stepping
+        through the columns in between.
+
+        Parameters
+        ----------
+        col : int
+            The column, which must be in the range from `get_reachable_cols`.
+        """
+
+        num_cols = col - self.current_falling_group[0].col
+        if num_cols != 0:
+            self._shift_falling_group(0, num_cols)
+        self.hard_drop()
@@ -0,0 +1,327 @@
+"""
+A bot that plays JellyBlocker by beam searching over every reachable placement of the falling groups
+"""
+
+from collections import namedtuple
+from time import perf_counter
+
+from Board import Board, GARBAGE
+from Jelly import JellyBlock
+
+ROTATIONS = ([], ['rotate right'], ['rotate right', 'rotate right'], ['rotate left'])
+
+SearchNode = namedtuple('SearchNode', ['root_actions', 'points', 'score'])
+
+def get_pose(board: Board) -> tuple:
+    """
+    Get the position and color of every jelly in the falling group.
+    """
+
+    return tuple((jelly.row, jelly.col, jelly.code) for jelly in board.current_falling_group)
+
+def resolve_chain(board: Board) -> tuple:
+    """
+    Settle and pop the board until nothing is left to pop, scoring the chain like `GameEngine`.
+
+    Returns
+    -------
+    tuple
+        `(points, popped, chain)`: the points scored, the number of jellies popped and the chain length.
+    """
+
+    points = 0
+    total_jellies_popped = 0
+    popping_chain = -1
+    chain = 0
+    while True:
+        board.settle()
+        num_jellies_popped = board.pop_jellies()
+        if num_jellies_popped == 0:
+            return points, total_jellies_popped, chain
+        total_jellies_popped += num_jellies_popped
+        popping_chain += 2
+        chain += 1
+        points += total_jellies_popped * popping_chain
+
+class Bot:
+    """
+    Chooses where to place each falling group with a beam search over placements.
+
+    Attributes
+    ----------
+    depth : int, default: 2
+        The number of falling groups to search. Only the current and next groups are known, so
+        depths above 2 are searched as 2.
+
+    beam_width : int, default: 8
+        The number of best boards kept at each depth.
+
+    time_budget : float, default: 0.05
+        The number of seconds a search may take before it returns the best placement found so far.
+
+    connection_weight : float, default: 1.0
+        How much the heuristic rewards groups of connected, same-colored jellies.
+
+    height_weight : float, default: 0.5
+        How much the heuristic penalizes tall columns.
+
+    max_transpositions : int, default: 200000
+        The number of evaluated boards to remember before the transposition table is cleared.
+    """
+
+    def __init__(self,
+                 depth=2,
+                 beam_width=8,
+                 time_budget=0.05,
+                 connection_weight=1.0,
+                 height_weight=0.5,
+                 max_transpositions=200000
+                 ):
+        self.depth = depth
+        self.beam_width = beam_width
+        self.time_budget = time_budget
+        self.connection_weight = connection_weight
+        self.height_weight = height_weight
+        self.max_transpositions = max_transpositions
+
+        self.transpositions = {}
+
+    def iter_placements(self, board: Board):
+        """
+        Find every distinct final placement of the falling group reachable by rotating, moving and hard dropping it.
+
+        Parameters
+        ----------
+        board : Board
+            The board, with its falling group on it.
+
+        Yields
+        ------
+        tuple
+            `(actions, points)` for every distinct placement. While each one is yielded, `board` has the group
+            placed and its chain resolved, and it is put back the way it was before the next one is made.
+
+        Notes
+        -----
+        Placements are made and unmade with `Board.snapshot` and `Board.restore` instead of copying the board,
+        so each one costs in proportion to the cells it changes. The board is also put back if the generator
+        is closed early. The group is dropped straight into each column reachable from where it was rotated,
+        instead of being moved there one column at a time.
+        """
+
+        seen_poses = set()
+        for rotation in ROTATIONS:
+            rotation_snapshot = board.snapshot()
+            try:
+                if not self.apply_actions(board, rotation):
+                    continue
+
+                # drop the group straight into every column it could be moved to
+                anchor_col = board.current_falling_group[0].col
+                min_col, max_col = board.get_reachable_cols()
+                for col in range(min_col, max_col + 1):
+                    drop_snapshot = board.snapshot()
+                    try:
+                        board.drop_falling_group_at(col)
+                        pose = get_pose(board)
+                        if pose not in seen_poses:
+                            seen_poses.add(pose)
+                            board.place_falling_group()
+                            points, _, _ = resolve_chain(board)
+                            if col < anchor_col:
+                                moves = ['move left'] * (anchor_col - col)
+                            else:
+                                moves = ['move right'] * (col - anchor_col)
+                            yield rotation + moves + ['hard drop'], points
+                    finally:
+                        board.restore(drop_snapshot)
+            finally:
+                board.restore(rotation_snapshot)
+
+    def apply_actions(self, board: Board, actions: list) -> bool:
+        """
+        Apply movement actions from `GameEngine.ACTIONS` directly to a board, placing the group on a hard drop.
+
+        Returns
+        -------
+        bool
+            Whether every action moved the falling group.
+        """
+
+        moved = True
+        for action in actions:
+            if action == 'hard drop':
+                board.hard_drop()
+                board.place_falling_group()
+                continue
+            pose = get_pose(board)
+            self.apply_action(board, action)
+            moved = moved and get_pose(board) != pose
+        return moved
+
+    @staticmethod
+    def apply_action(board: Board, action: str):
+        """
+        Apply a movement action from `GameEngine.ACTIONS` directly to a board.
+        """
+
+        if action == 'move left':
+            board.move_falling_group_left()
+        elif action == 'move right':
+            board.move_falling_group_right()
+        elif action == 'rotate left':
+            board.rotate_falling_group_left()
+        elif action == 'rotate right':
+            board.rotate_falling_group_right()
+
+    def get_state_key(self, board: Board):
+        """
+        Get the key the transposition table stores a board under.
+        """
+
+        return board.state_hash()
+
+    def evaluate(self, board: Board) -> float:
+        """
+        Score how good a settled board is, rewarding large groups that haven't popped yet and penalizing tall columns.
+
+        Parameters
+        ----------
+        board : Board
+            The board to evaluate.
+
+        Returns
+        -------
+        float
+            The heuristic score, cached in the transposition table.
+        """
+
+        key = self.get_state_key(board)
+        score = self.transpositions.get(key)
+        if score is not None:
+            return score
+
+        score = 0.0
+        for code in range(GARBAGE + 1, len(board.color_masks)):
+            color_mask = board.color_masks[code]
+            remaining = color_mask
+            while remaining:
+                group = board.get_connected_group(remaining & -remaining, color_mask)
+                remaining &= ~group
+                group_size = group.bit_count()
+                score += self.connection_weight * (group_size - 1) * (group_size - 1)
+
+        for column_top in board.column_tops:
+            height = board.height - column_top
+            score -= self.height_weight * height * height
+
+        if len(self.transpositions) >= self.max_transpositions:
+            self.transpositions.clear()
+        self.transpositions[key] = score
+        return score
+
+    def search(self, board: Board) -> list:
+        """
+        Beam search placements of the current and next falling groups.
+
+        Parameters
+        ----------
+        board : Board
+            The board, with its falling group on it.
+
+        Returns
+        -------
+        list
+            The actions leading to the best placement of the current falling group, ending with a hard drop.
+        """
+
+        deadline = perf_counter() + self.time_budget
+        search_depth = min(self.depth, 2)
+
+        # score every placement of the current falling group, keeping only the best way of reaching each board
+        candidates = {}
+        placements = self.iter_placements(board)
+        for actions, points in placements:
+            score = points + self.evaluate(board)
+            key = self.get_state_key(board)
+            if key not in candidates or candidates[key].score < score:
+                candidates[key] = SearchNode(actions, points, score)
+            if perf_counter() > deadline:
+                break
+        placements.close()
+
+        if len(candidates) == 0:
+            return ['hard drop']
+        beam = sorted(candidates.values(), key=lambda node: node.score, reverse=True)[:self.beam_width]
+        if search_depth < 2 or perf_counter() > deadline:
+            return beam[0].root_actions
+
+        # remake each of the best placements, spawn the next falling group, and score its placements
+        best_node = beam[0]
+        best_score = None
+        for node in beam:
+            snapshot = board.snapshot()
+            try:
+                self.apply_actions(board, node.root_actions)
+                resolve_chain(board)
+
+                # skip placements that end the game
+                board.current_falling_group = [JellyBlock.from_code(jelly.code, True) for jelly in board.next_falling_group]
+                if not board.add_falling_group_to_board():
+                    continue
+
+                placements = self.iter_placements(board)
+                for _, points in placements:
+                    score = node.points + points + self.evaluate(board)
+                    if best_score is None or score > best_score:
+                        best_node = node
+                        best_score = score
+                    if perf_counter() > deadline:
+                        break
+                placements.close()
+            finally:
+                board.restore(snapshot)
+
+            if perf_counter() > deadline:
+                break
+
+        return best_node.root_actions
+
+class BotPlayer:
+    """
+    A policy for `GameEngine` that plans each new falling group with a `Bot` and then plays the plan
+    one action per tick, so it can drive real-time or headless games.
+
+    Attributes
+    ----------
+    bot : Bot, default: Bot()
+        The bot that plans each placement.
+    """
+
+    def __init__(self, bot=None):
+        self.bot = bot if bot is not None else Bot()
+        self.planned_group = None
+        self.plan = []
+
+    def __call__(self, engine):
+        """
+        Get the next action to play.
+
+        Parameters
+        ----------
+        engine : GameEngine
+            The engine being played.
+
+        Returns
+        -------
+        str
+            The next action from `GameEngine.ACTIONS`, or None.
+        """
+
+        if engine.board.current_falling_group is not self.planned_group:
+            self.planned_group = engine.board.current_falling_group
+            self.plan = self.bot.search(engine.board)
+
+        if self.plan:
+            return self.plan.pop(0)
+        return None
@@ -2,55 +2,87 @@
 The command line GUI for Jellyblocker
 """
 
-from threading import Thread
-from time import sleep
-from pynput.keyboard import Listener, KeyCode
+import asyncio
+import os
 import random
 
+from AsyncDriver import AsyncGame
+from GameEngine import GameSnapshot
 from GUI import GUI
-from JellyBlocker import JellyBlocker
-from Jelly import Jelly
+import Profiler
+from RenderStage import RenderStage
+from Jelly import Jelly, CODE_JELLIES, FALLING_FLAG
+from TerminalRenderer import TerminalRenderer
+
+# the text drawn for every cell code, falling or not
+CELL_STRINGS = [CODE_JELLIES[code & ~FALLING_FLAG].value if code & ~FALLING_FLAG < len(CODE_JELLIES) else '??'
+                for code in range(256)]
 
 class CommandLineGUI(GUI):
 
     def __init__(self, 
-                 jelly_blocker=JellyBlocker()
+                 jelly_blocker=None,
+                 max_fps=30
                  ):
         
         super().__init__(jelly_blocker)
 
+        self.max_fps = max_fps
+        self.loop = None
+        self.game = None
+        self.program_finished = None
+        self.renderer = TerminalRenderer(CELL_STRINGS)
+        self.render_stage = None
+
     def update_display(self):
         """
-        Print the board to the console and all other info for the user, skipping the top row.
+        Draw the game's last published snapshot to the console right away, skipping the top row.
+        """
+
+        snapshot = self.jelly_blocker.snapshot
+        if snapshot is not None:
+            self.draw_frame(snapshot)
+
+    def get_frame(self, snapshot: GameSnapshot) -> tuple:
+        """
+        Lay out a snapshot of the game as rows of cells and lines of info.
+
+        Returns
+        -------
+        tuple
+            `(rows, GUI_lines)`: the cell codes of every row but the top one, and the lines of info beside them.
         """
 
         GUI_lines = [
-            "Time: " + str(self.jelly_blocker.game_time // 100) + "." + str(self.jelly_blocker.game_time % 100),
-            "Points: " + str(self.jelly_blocker.points),
-            "Level: " + str(self.jelly_blocker.level),
+            "Time: " + str(snapshot.tick // 100) + "." + str(snapshot.tick % 100),
+            "Points: " + str(snapshot.points),
+            "Level: " + str(snapshot.level),
             "",
             "Next: "
         ]
 
-        num_jellies_per_line = len(self.jelly_blocker.board.next_falling_group) // 2
+        num_jellies_per_line = len(snapshot.next_group) // 2
         count = 0
         line = ""
-        for jelly in self.jelly_blocker.board.next_falling_group:
-            line += jelly.color.value
+        for code in snapshot.next_group:
+            line += CELL_STRINGS[code]
             if count % num_jellies_per_line == 0:
                 GUI_lines.append(line)
                 line = ""
             count += 1
         GUI_lines.append("")
 
-        for row in self.jelly_blocker.board.board[1:]:
-            for jelly in row:
-                print(jelly.color.value, end="")
-            if len(GUI_lines) > 0:
-                line = GUI_lines.pop(0)
-                print(" " + line, end="")
-            print()
-        print()
+        width = snapshot.width
+        rows = [snapshot.cells[row * width:(row + 1) * width] for row in range(1, snapshot.height)]
+        return rows, GUI_lines
+
+    def draw_frame(self, snapshot: GameSnapshot):
+        """
+        Draw a snapshot of the game, rewriting only the cells and lines that changed since the last draw.
+        This only reads the snapshot, so it can run on any thread.
+        """
+
+        self.renderer.render(*self.get_frame(snapshot))
 
     def print_controls(self):
         """
@@ -63,6 +95,7 @@ class CommandLineGUI(GUI):
                 print(binding[0].upper() + binding[1:], "-", "[" + self.game_action_key_bindings[binding].char + "]")
             except AttributeError:
                 print(binding[0].upper() + binding[1:], "-", "[" + self.game_action_key_bindings[binding].name + "]")
+        self.renderer.invalidate()
 
     def print_program_commands(self):
         """
@@ -77,13 +110,34 @@ class CommandLineGUI(GUI):
                 print(binding[0].upper() + binding[1:], "-", "[" + self.program_key_bindings[binding].name + "]")
 
     def game_over(self):
-        print("Game Over! You scored", self.jelly_blocker.points, " points.")
-        sleep(1)
-        self.print_controls()
+        self.jelly_blocker.game_running = False
+
+        # draw the final board, then the game over message after it
+        self.render_stage.draw_latest(skip_if_busy=False)
+        self.render_stage.run_in_writer(self.print_game_over)
+        self.loop.call_later(1, self.render_stage.run_in_writer, self.print_controls)
+
+    def print_game_over(self):
+        """
+        Print the player's final score.
+        """
+
+        print("Game Over! You scored", self.jelly_blocker.snapshot.points, " points.")
+        self.renderer.invalidate()
+
+    def start_game(self):
+        """
+        Start a new game on the event loop.
+        """
 
-    def on_press(self, keybind: KeyCode):
+        self.jelly_blocker.game_running = True
+        self.jelly_blocker.reset()
+        self.game = AsyncGame(self.jelly_blocker, None, self.game_over)
+        self.game.start()
+
+    def on_press(self, keybind: 'KeyCode'):
         """
-        When the user presses a key, add it to `pressed_keys` and execute the actions of all pressed keys.
+        When the user presses a key, hand it to the event loop. This runs on the keyboard listener's thread.
 
         Parameters
         ----------
@@ -96,6 +150,37 @@ class CommandLineGUI(GUI):
             When the user presses the `leave_program` key, return False. Else, return True.
         """
 
+        self.loop.call_soon_threadsafe(self.handle_press, keybind)
+        return keybind != self.program_key_bindings['leave program']
+
+    def on_release(self, keybind: 'KeyCode'):
+        """
+        When a key is released, hand it to the event loop. This runs on the keyboard listener's thread.
+
+        Parameters
+        ----------
+        keybind : KeyCode
+            The key the user released.
+
+        Returns
+        -------
+        bool
+            True
+        """
+
+        self.loop.call_soon_threadsafe(self.handle_release, keybind)
+        return True
+
+    def handle_press(self, keybind: 'KeyCode'):
+        """
+        Add a pressed key to `pressed_keys` and execute the actions of all pressed keys.
+
+        Parameters
+        ----------
+        keybind : KeyCode
+            The key the user pressed.
+        """
+
         # add the key to the pressed keys list
         self.pressed_keys.add(keybind)
 
@@ -103,92 +188,88 @@ class CommandLineGUI(GUI):
         for pressed_key in self.pressed_keys:
             if self.jelly_blocker.game_running:
 
-                if pressed_key == self.game_action_key_bindings['move left']:
-                    self.jelly_blocker.board.move_falling_group_left()
-                    self.update_display()
-                elif pressed_key == self.game_action_key_bindings['move right']:
-                    self.jelly_blocker.board.move_falling_group_right()
-                    self.update_display()
-                elif pressed_key == self.game_action_key_bindings['rotate left']:
-                    self.jelly_blocker.board.rotate_falling_group_left()
-                    self.update_display()
-                elif pressed_key == self.game_action_key_bindings['rotate right']:
-                    self.jelly_blocker.board.rotate_falling_group_right()
-                    self.update_display()
-                elif pressed_key == self.game_action_key_bindings['fast drop']:
-                    self.jelly_blocker.fast_drop = True
-            
+                # queue the action to be applied between ticks
+                for action in ('move left', 'move right', 'rotate left', 'rotate right', 'fast drop'):
+                    if pressed_key == self.game_action_key_bindings[action]:
+                        self.game.post_action(action)
+                        break
+
             # key behavior regardless of whether the game is running or not
             if pressed_key == self.program_key_bindings['leave program']:
-                return False
-            
+                if self.game is not None:
+                    self.game.stop()
+                self.program_finished.set()
+                return
+
             # key behavior if the game is not running
             if not self.jelly_blocker.game_running:
                 if pressed_key == self.program_key_bindings['start game']:
-                    self.jelly_blocker.game_running = True
-
-                    # create a new thread to run the game and start it
-                    run_game_thread = Thread(target=self.jelly_blocker.run_game, args=(self.update_display, self.game_over))
-                    run_game_thread.daemon = True
-                    run_game_thread.start()
+                    self.start_game()
                 elif pressed_key == self.program_key_bindings["view controls"]:
-                    self.print_controls()
-
-        return True
+                    self.render_stage.run_in_writer(self.print_controls)
 
-    def on_release(self, keybind: KeyCode):
+    def handle_release(self, keybind: 'KeyCode'):
         """
-        When a key is released, remove it from `pressed_keys` and perform any game actions related to releasing keys.
+        Remove a released key from `pressed_keys` and perform any game actions related to releasing keys.
 
         Parameters
         ----------
         keybind : KeyCode
             The key the user released.
-
-        Returns
-        -------
-        bool
-            True
         """
 
         # try removing the key from the pressed_keys list, and return if it wasn't there in the first place
         try:
             self.pressed_keys.remove(keybind)
         except KeyError:
-            return True
+            return
 
         # key behavior while game is running
         if self.jelly_blocker.game_running:
 
             if keybind == self.game_action_key_bindings['fast drop']:
-                self.jelly_blocker.fast_drop = False
-        
-        return True
+                self.game.post_action('release fast drop')
 
-    def collect_inputs(self):
+    async def collect_inputs(self):
         """
-        Continuously listen for keyboard inputs from the user.
+        Listen for keyboard inputs from the user until they leave the program.
         """
 
-        # collect keyboard inputs indefinitely
+        from pynput.keyboard import Listener
+
+        self.loop = asyncio.get_running_loop()
+        self.program_finished = asyncio.Event()
+
+        # the board is drawn on its own schedule, and written to the console on its own thread
+        self.render_stage = RenderStage(self.jelly_blocker, self.draw_frame, self.max_fps)
+        self.render_stage.start()
+
+        # the listener runs on its own thread and hands every key to the event loop
         with Listener(
             on_press=self.on_press,
             on_release=self.on_release
-            ) as listener:
-            listener.join()
+            ):
+            await self.program_finished.wait()
+
+        await self.render_stage.close()
 
     def run_program(self):
         """
         Run to run the command line GUI program for Jelly Blocker.
         """
 
+        # if JELLYBLOCKER_PROFILE is set, profile the game and dump the profile to the path it holds on exit
+        if os.environ.get('JELLYBLOCKER_PROFILE'):
+            Profiler.enable(os.environ['JELLYBLOCKER_PROFILE'], [(CommandLineGUI, ['update_display', 'draw_frame'])])
+
         # loop until the program is no longer running
         title_jellies = random.sample([Jelly.RED, Jelly.GREEN, Jelly.BLUE, Jelly.PURPLE, Jelly.YELLOW], 4)
         print(title_jellies[0].value + title_jellies[1].value + " Welcome to JellyBlocker " + title_jellies[2].value + title_jellies[3].value)
         self.print_program_commands()
-        self.collect_inputs()
+        asyncio.run(self.collect_inputs())
 
         exit(0)
 
-cmd_gui = CommandLineGUI()
-cmd_gui.run_program()
\ No newline at end of file
+if __name__ == '__main__':
+    cmd_gui = CommandLineGUI()
+    cmd_gui.run_program()
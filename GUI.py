@@ -1,18 +1,22 @@
-import sys
-from pynput.keyboard import Key, Listener, KeyCode
-
 from JellyBlocker import JellyBlocker
 
 class GUI:
     """
     GUI Abstract Class, not to be instantiated
+
+    Notes
+    -----
+    pynput is only imported when a GUI is created, so the game can be imported and played headless without it.
     """
 
     def __init__(self, 
-                 jelly_blocker=JellyBlocker()
+                 jelly_blocker=None
                  ):
-        
-        self.jelly_blocker = jelly_blocker
+
+        # imported here so importing the game never loads a keyboard backend
+        from pynput.keyboard import Key, KeyCode
+
+        self.jelly_blocker = jelly_blocker if jelly_blocker is not None else JellyBlocker()
 
         self.game_action_key_bindings = {
             'move left': Key.left,
@@ -0,0 +1,481 @@
+import random
+from collections import namedtuple
+
+from Board import Board
+
+# an immutable copy of a game's state, published once per tick by `GameEngine.publish_snapshot`
+# the falling groups are stored as cell codes, with `FALLING_FLAG` set on falling jellies
+GameSnapshot = namedtuple('GameSnapshot', ['version', 'tick', 'width', 'height', 'cells', 'current_group',
+                                           'next_group', 'points', 'level', 'pending_garbage', 'game_finished'])
+
+class GameEngine:
+    """
+    Runs the rules of the game one tick at a time, with no timing or display of its own.
+
+    Attributes
+    ----------
+    board : Board, default: Board()
+        The board the game will be played on.
+
+    num_landed_iterations_before_placement : int, default: 5
+        The number of cycles a falling jelly group can stay on the ground before it is placed.
+
+    gravity_speed : int, default: 20
+        The number of ticks between falls for jellies affected by gravity.
+
+    num_pops_to_level : int, default: 50
+        The number of jellies to pop before leveling up the difficulty.
+
+    falling_speed : int, default: 100
+        The number of ticks between falls for a group of controlled jellies.
+
+    fast_drop_multiplier : int, default: 5
+        How much the falling speed should be multiplied when fast drop is active.
+
+    instant_gravity : bool, default: True
+        Whether a placement's gravity and popping chain resolve within one tick instead of
+        falling one row every `gravity_speed` ticks.
+
+    points_per_garbage : int, default: 8
+        The number of points a chain needs to score to send one garbage jelly to an opponent.
+
+    pending_garbage : int
+        The number of garbage jellies sent by an opponent, dropped onto the board when the next chain ends.
+
+    outgoing_garbage : int
+        The number of garbage jellies this game's chains have sent that haven't been taken by `take_outgoing_garbage`.
+
+    garbage_random : random.Random
+        The random number generator choosing where received garbage lands. It is kept apart from the board's,
+        so receiving garbage never changes the falling groups.
+
+    snapshot : GameSnapshot
+        The game's state as of the last `publish_snapshot`, or None before the first one.
+
+    Notes
+    -----
+    A tick is one hundredth of a second of game time.
+
+    Only the thread driving the game touches the engine and its board. Any other reader, like a renderer or a
+    state stream, reads `snapshot` instead, which is never changed once published, only replaced whole. A reader
+    that took a snapshot can keep using it while the game moves on, so it never sees a half updated state,
+    and the game never waits for it.
+    """
+
+    ACTIONS = ('move left', 'move right', 'rotate left', 'rotate right', 'fast drop', 'release fast drop', 'hard drop')
+
+    def __init__(self,
+                 board=None,
+                 num_landed_iterations_before_placement=5,
+                 gravity_speed=20,
+                 num_pops_to_level=50,
+                 falling_speed=100,
+                 fast_drop_multiplier=5,
+                 instant_gravity=True,
+                 points_per_garbage=8
+                 ):
+        self.board = board if board is not None else Board()
+        self.num_landed_iterations_before_placement = num_landed_iterations_before_placement
+        self.gravity_speed = gravity_speed
+        self.num_pops_to_level = num_pops_to_level
+        self.falling_speed = falling_speed
+        self.fast_drop_multiplier = fast_drop_multiplier
+        self.instant_gravity = instant_gravity
+        self.points_per_garbage = points_per_garbage
+
+        self.game_time = 0
+        self.points = 0
+        self.jellies_popped_stat = 0
+        self.level = 1
+        self.fast_drop = False
+        self.game_finished = False
+        self.frame_version = 0
+
+        self.resolving_chain = False
+        self.chain = 0
+        self.total_jellies_popped = 0
+        self.popping_chain = -1
+        self.ticks_until_gravity = 0
+        self.chain_start_points = 0
+        self.pending_garbage = 0
+        self.outgoing_garbage = 0
+        self.garbage_random = random.Random()
+        self.snapshot = None
+
+        self.count_iterations_without_change = 0
+        self.count_iterations_without_moving_down = 0
+        self.prev_row = 0
+        self.prev_col = 0
+
+    def set_board(self, board: Board):
+        """
+        Sets the board to a new board.
+
+        Parameters
+        ----------
+        board : Board
+            The new board to replace the old board with.
+        """
+
+        self.board = board
+
+    def get_falling_speed(self):
+        """
+        Calculates and returns falling speed based on `self.level` and `self.fast_drop_multiplier`.
+
+        Returns
+        -------
+        int
+            The calculated falling speed, never less than one tick.
+        """
+
+        if self.fast_drop:
+            return max(1, self.falling_speed // self.level // self.fast_drop_multiplier)
+        return max(1, self.falling_speed // self.level)
+
+    def reset(self, board=None, garbage_seed=None):
+        """
+        Start a new game on a new board and add the first falling group to it.
+
+        Parameters
+        ----------
+        board : Board, optional
+            The board to play on. A default `Board()` is created if not given.
+
+        garbage_seed : int, optional
+            The seed of `garbage_random`. A random one is used if not given.
+        """
+
+        self.set_board(board if board is not None else Board())
+        self.garbage_random = random.Random(garbage_seed)
+
+        self.game_time = 0
+        self.points = 0
+        self.jellies_popped_stat = 0
+        self.level = 1
+        self.fast_drop = False
+        self.game_finished = False
+        self.resolving_chain = False
+        self.chain = 0
+        self.pending_garbage = 0
+        self.outgoing_garbage = 0
+        self.count_iterations_without_change = 0
+        self.count_iterations_without_moving_down = 0
+
+        # add the first falling group to the board
+        self.board.add_falling_group_to_board()
+        self.prev_row = self.board.current_falling_group[0].row
+        self.prev_col = self.board.current_falling_group[0].col
+        self.frame_version += 1
+        self.publish_snapshot()
+
+    def publish_snapshot(self) -> GameSnapshot:
+        """
+        Replace `snapshot` with a copy of the current state, if the game changed since the last one.
+        Drivers call this at each tick boundary, after applying inputs.
+
+        Returns
+        -------
+        GameSnapshot
+            The published snapshot.
+
+        Notes
+        -----
+        The snapshot's `version` is the `frame_version` it was taken at, and its `tick` the game time
+        the game last changed.
+        """
+
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version == self.frame_version:
+            return snapshot
+
+        board = self.board
+        snapshot = GameSnapshot(self.frame_version, self.game_time, board.width, board.height, bytes(board.cells),
+                                tuple((jelly.cell_code, jelly.row, jelly.col) for jelly in board.current_falling_group),
+                                bytes([jelly.cell_code for jelly in board.next_falling_group]),
+                                self.points, self.level, self.pending_garbage, self.game_finished)
+
+        # a single assignment, so readers on other threads see either the old snapshot or the new one
+        self.snapshot = snapshot
+        return snapshot
+
+    def get_next_event_tick(self) -> int:
+        """
+        Get the next tick at which `step` does anything other than count the tick, if no action is given.
+
+        Returns
+        -------
+        int
+            The next falling or gravity tick.
+        """
+
+        if self.resolving_chain:
+            return self.game_time + max(0, self.ticks_until_gravity - 1)
+
+        falling_speed = self.get_falling_speed()
+        return (self.game_time + falling_speed - 1) // falling_speed * falling_speed
+
+    def fast_forward(self, until_tick: int):
+        """
+        Skip ticks where nothing happens, up to the next falling or gravity tick or `until_tick`.
+
+        Parameters
+        ----------
+        until_tick : int
+            The latest tick to skip to.
+        """
+
+        target_tick = min(self.get_next_event_tick(), until_tick)
+        if target_tick > self.game_time:
+            if self.resolving_chain:
+                self.ticks_until_gravity -= target_tick - self.game_time
+            self.game_time = target_tick
+
+    def advance(self, until_tick: int, policy=None):
+        """
+        Step the game until `game_time` reaches `until_tick` or the game is over.
+
+        Parameters
+        ----------
+        until_tick : int
+            The tick to stop at, without stepping it.
+
+        policy : function, optional
+            Called with this engine before every tick to get an action to apply. Without one, ticks where
+            nothing happens are skipped with `fast_forward`.
+        """
+
+        while self.game_time < until_tick and not self.game_finished:
+            if policy is not None:
+                self.step(policy(self))
+                continue
+
+            self.fast_forward(until_tick)
+            if self.game_time < until_tick:
+                self.step()
+
+        self.publish_snapshot()
+
+    def apply_action(self, action: str):
+        """
+        Apply a player action to the falling group.
+
+        Parameters
+        ----------
+        action : str
+            One of `GameEngine.ACTIONS`.
+        """
+
+        if action == 'move left':
+            self.board.move_falling_group_left()
+        elif action == 'move right':
+            self.board.move_falling_group_right()
+        elif action == 'rotate left':
+            self.board.rotate_falling_group_left()
+        elif action == 'rotate right':
+            self.board.rotate_falling_group_right()
+        elif action == 'fast drop':
+            self.fast_drop = True
+        elif action == 'release fast drop':
+            self.fast_drop = False
+        elif action == 'hard drop':
+            self.board.hard_drop()
+        else:
+            raise ValueError("Unknown action: " + repr(action))
+
+        self.frame_version += 1
+
+    def step(self, action=None) -> tuple:
+        """
+        Advance the game by one tick, applying `action` first if one is given.
+
+        Parameters
+        ----------
+        action : str, optional
+            One of `GameEngine.ACTIONS`.
+
+        Returns
+        -------
+        tuple
+            `(state, popped, chain, points, game_over)`: the board, the number of jellies popped this tick,
+            the length of the current popping chain, the total points, and whether the game is over.
+        """
+
+        if self.game_finished:
+            return self.board, 0, self.chain, self.points, True
+
+        if action is not None:
+            self.apply_action(action)
+
+        num_jellies_popped = 0
+        if self.resolving_chain:
+            self.ticks_until_gravity -= 1
+            if self.ticks_until_gravity <= 0:
+                num_jellies_popped = self.apply_gravity_step()
+        elif self.game_time % self.get_falling_speed() == 0:
+            num_jellies_popped = self.apply_falling_step()
+
+        self.game_time += 1
+        return self.board, num_jellies_popped, self.chain, self.points, self.game_finished
+
+    def apply_falling_step(self) -> int:
+        """
+        Move the falling group down, and place it once it has landed for long enough.
+
+        Returns
+        -------
+        int
+            The number of jellies popped by the placement, if it resolved immediately.
+        """
+
+        # move the falling group down
+        # if the falling group didn't move down, tick the counter up
+        if not self.board.move_falling_group_down():
+            self.count_iterations_without_moving_down += 1
+        else:
+            self.count_iterations_without_moving_down = 0
+
+        # if the falling group hasn't moved since last iteration, tick the counter up
+        if self.prev_row == self.board.current_falling_group[0].row and \
+           self.prev_col == self.board.current_falling_group[0].col:
+            self.count_iterations_without_change += 1
+        else:
+            self.count_iterations_without_change = 0
+
+        # if the falling group hasn't been moved for `num_landed_iterations_before_placement // 2` iterations, place it
+        # if the falling group hasn't moved down in `num_landed_iterations_before_placement` iterations, place it
+        num_jellies_popped = 0
+        if self.count_iterations_without_change >= self.num_landed_iterations_before_placement // 2 or \
+           self.count_iterations_without_moving_down >= self.num_landed_iterations_before_placement:
+            num_jellies_popped = self.place_falling_group()
+
+        self.prev_row = self.board.current_falling_group[0].row
+        self.prev_col = self.board.current_falling_group[0].col
+        self.frame_version += 1
+        return num_jellies_popped
+
+    def place_falling_group(self) -> int:
+        """
+        Place the current falling group, get a new one, and start popping jellies.
+
+        Returns
+        -------
+        int
+            The number of jellies popped, if the chain resolved immediately.
+        """
+
+        self.count_iterations_without_change = 0
+        self.count_iterations_without_moving_down = 0
+
+        if not self.board.cycle_falling_groups():
+            self.game_finished = True
+            return 0
+
+        self.chain = 0
+        self.total_jellies_popped = 0
+        self.popping_chain = -1
+        self.chain_start_points = self.points
+
+        if not self.instant_gravity:
+            self.resolving_chain = True
+            self.ticks_until_gravity = self.gravity_speed
+            return 0
+
+        # settle and pop until nothing is left to pop
+        num_jellies_popped = 0
+        while True:
+            self.board.settle()
+            num_popped_this_step = self.pop_jellies()
+            if num_popped_this_step == 0:
+                break
+            num_jellies_popped += num_popped_this_step
+
+        self.end_chain()
+        return num_jellies_popped
+
+    def apply_gravity_step(self) -> int:
+        """
+        Move every jelly in the air down by one, and pop jellies once they have all landed.
+
+        Returns
+        -------
+        int
+            The number of jellies popped.
+        """
+
+        self.ticks_until_gravity = self.gravity_speed
+        self.frame_version += 1
+        if self.board.apply_gravity():
+            return 0
+
+        # pop any jellies that are now in large enough groups, and end the chain if there were none
+        num_jellies_popped = self.pop_jellies()
+        if num_jellies_popped == 0:
+            self.resolving_chain = False
+            self.end_chain()
+        return num_jellies_popped
+
+    def pop_jellies(self) -> int:
+        """
+        Pop jellies on the board and score them as the next step of the current chain.
+
+        Returns
+        -------
+        int
+            The number of jellies popped.
+        """
+
+        num_jellies_popped = self.board.pop_jellies()
+        self.total_jellies_popped += num_jellies_popped
+        self.jellies_popped_stat += num_jellies_popped
+        self.popping_chain += 2
+
+        if num_jellies_popped == 0:
+            return 0
+        self.chain += 1
+
+        # if enough jellies have been popped to level up, level up
+        if self.jellies_popped_stat >= self.num_pops_to_level * self.level:
+            self.level += 1
+
+        # this is how points are calculated, given to the user after every pop in a chain
+        self.points += self.total_jellies_popped * self.popping_chain
+        return num_jellies_popped
+
+    def end_chain(self):
+        """
+        Send garbage for the points the chain that just ended scored, cancelling out pending garbage first,
+        then drop whatever pending garbage is left onto the board.
+        """
+
+        num_garbage_sent = (self.points - self.chain_start_points) // self.points_per_garbage
+        num_garbage_cancelled = min(num_garbage_sent, self.pending_garbage)
+        self.pending_garbage -= num_garbage_cancelled
+        self.outgoing_garbage += num_garbage_sent - num_garbage_cancelled
+
+        if self.pending_garbage > 0:
+            self.board.add_garbage(self.pending_garbage, self.garbage_random)
+            self.pending_garbage = 0
+            self.frame_version += 1
+
+    def receive_garbage(self, num_jellies: int):
+        """
+        Queue garbage sent by an opponent, to be dropped when the next chain ends.
+        """
+
+        self.pending_garbage += num_jellies
+        self.frame_version += 1
+
+    def take_outgoing_garbage(self) -> int:
+        """
+        Collect the garbage this game has sent since it was last collected, to hand to an opponent.
+
+        Returns
+        -------
+        int
+            The number of garbage jellies.
+        """
+
+        num_jellies = self.outgoing_garbage
+        self.outgoing_garbage = 0
+        return num_jellies
@@ -0,0 +1,515 @@
+"""
+Hosts many versus matches in one process over TCP, stepping every match from a single tick loop
+"""
+
+import asyncio
+import base64
+import json
+import random
+from argparse import ArgumentParser
+from collections import deque
+
+from Board import Board
+from GameEngine import GameEngine
+from Scheduler import FixedTimestepScheduler
+from StateStream import StateEncoder
+
+# the most actions a player can queue between two ticks, more are dropped oldest first
+MAX_QUEUED_ACTIONS = 16
+
+# the longest line a client can send
+MAX_LINE_BYTES = 1024
+
+# the most bytes a client can fall behind on reading before frames to it are skipped
+MAX_WRITE_BUFFER_BYTES = 64 * 1024
+
+class Player:
+    """
+    One client's connection and, once matched, their game or the match they are watching.
+
+    Attributes
+    ----------
+    writer : asyncio.StreamWriter
+        The client's connection.
+
+    actions : collections.deque
+        The actions waiting to be applied at the next tick, at most `MAX_QUEUED_ACTIONS`.
+
+    match : Match
+        The match the player is in, or None while they wait for an opponent.
+
+    index : int
+        The player's index in their match.
+
+    spectating : bool
+        Whether the client is watching `match` instead of playing in it.
+
+    needs_keyframe : bool
+        Whether the client must be sent keyframes before any more deltas, because it hasn't been sent any yet
+        or a frame to it was skipped.
+
+    connected : bool
+        Whether the client is still connected and in a running match or waiting for one.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.actions = deque(maxlen=MAX_QUEUED_ACTIONS)
+        self.match = None
+        self.index = 0
+        self.spectating = False
+        self.needs_keyframe = True
+        self.connected = True
+
+    def send(self, message: dict):
+        """
+        Send a message as one line of JSON, without waiting for it to be written.
+        """
+
+        self.send_line(encode_message(message))
+
+    def send_line(self, line: bytes):
+        """
+        Send an already encoded line, so a message sent to many clients is only encoded once.
+        """
+
+        if self.connected and not self.writer.is_closing():
+            self.writer.write(line)
+
+    def is_behind(self) -> bool:
+        """
+        Whether the client hasn't read `MAX_WRITE_BUFFER_BYTES` of earlier messages yet.
+        """
+
+        return self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER_BYTES
+
+def encode_message(message: dict) -> bytes:
+    """
+    Encode a message as one line of compact JSON.
+    """
+
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+def encode_frame_message(player_index: int, frame: bytes) -> bytes:
+    """
+    Encode a `StateStream` frame of one player's game as a message line, with the frame in base64.
+    """
+
+    return encode_message({'type': 'frame', 'player': player_index, 'data': base64.b64encode(frame).decode()})
+
+class Match:
+    """
+    A versus game between two players, where each player's chains send garbage to the other.
+
+    Attributes
+    ----------
+    match_id : int
+        The match's id.
+
+    players : list
+        The two `Player`s.
+
+    engines : list
+        Each player's `GameEngine`, in the same order.
+
+    encoders : list
+        A `StateEncoder` streaming each player's game, in the same order.
+
+    spectators : list
+        The `Player`s watching the match.
+
+    start_tick : int
+        The server tick the match started on, which is tick 0 of both games.
+
+    seed : int
+        The seed of both boards, so both players get the same falling groups, and of where each player's
+        received garbage lands.
+
+    winner : int
+        The index of the winning player, or None for a draw or while the match is still going.
+
+    finished : bool
+        Whether the match is over.
+    """
+
+    def __init__(self, match_id: int, players: list, start_tick: int, seed: int, engine_options=None,
+                 keyframe_interval=500):
+        self.match_id = match_id
+        self.players = players
+        self.start_tick = start_tick
+        self.seed = seed
+        self.winner = None
+        self.finished = False
+        self.spectators = []
+
+        self.engines = []
+        self.encoders = []
+        for index, player in enumerate(players):
+            player.match = self
+            player.index = index
+            engine = GameEngine(**(engine_options or {}))
+            engine.reset(Board(seed=seed), garbage_seed=seed)
+            self.engines.append(engine)
+            self.encoders.append(StateEncoder(engine, keyframe_interval))
+
+    def add_spectator(self, player: Player):
+        """
+        Start streaming the match to a client, from keyframes of its current state.
+        """
+
+        player.match = self
+        player.spectating = True
+        player.needs_keyframe = True
+        self.spectators.append(player)
+
+    def advance(self, tick: int):
+        """
+        Run both games up to a server tick, then apply queued actions, hand garbage across, and publish
+        both games' snapshots for `send_state`.
+
+        Parameters
+        ----------
+        tick : int
+            The server tick to run up to, not including it.
+        """
+
+        for player, engine in zip(self.players, self.engines):
+            engine.advance(tick - self.start_tick)
+            while player.actions and not engine.game_finished:
+                engine.apply_action(player.actions.popleft())
+
+        # each game's chains send garbage to the other
+        for index, engine in enumerate(self.engines):
+            num_jellies = engine.take_outgoing_garbage()
+            if num_jellies > 0:
+                self.engines[1 - index].receive_garbage(num_jellies)
+
+        for engine in self.engines:
+            engine.publish_snapshot()
+
+        finished = [engine.game_finished or not player.connected for player, engine in zip(self.players, self.engines)]
+        if any(finished):
+            self.finished = True
+            if not all(finished):
+                self.winner = finished.index(False)
+
+    def send_state(self):
+        """
+        Send what changed in both games to the players and spectators. Each frame is encoded once for everyone.
+
+        Notes
+        -----
+        Clients that are behind on reading are skipped, and sent keyframes once they catch up, since the deltas
+        they missed are gone.
+        """
+
+        frame_lines = []
+        for index, encoder in enumerate(self.encoders):
+            frame = encoder.encode()
+            if frame is not None:
+                frame_lines.append(encode_frame_message(index, frame))
+
+        keyframe_lines = None
+        for client in self.players + self.spectators:
+            if not client.connected:
+                continue
+            if client.is_behind():
+                client.needs_keyframe = True
+            elif client.needs_keyframe:
+                if keyframe_lines is None:
+                    keyframe_lines = [encode_frame_message(index, encoder.get_keyframe())
+                                      for index, encoder in enumerate(self.encoders)]
+                for line in keyframe_lines:
+                    client.send_line(line)
+                client.needs_keyframe = False
+            else:
+                for line in frame_lines:
+                    client.send_line(line)
+
+class GameServer:
+    """
+    Pairs up clients as they connect and runs all of their matches from one tick loop on one event loop.
+
+    Clients speak one JSON object per line. A client sends `{"play": true}` to be matched with an opponent,
+    or `{"watch": ...}` with a match id to spectate it. The server sends `{"type": "waiting"}` while a player
+    waits, `{"type": "start", ...}` when they are matched or `{"type": "watching", ...}` to a spectator,
+    `{"type": "frame", "player": ..., "data": ...}` with a base64 `StateStream` frame as each game changes,
+    and `{"type": "over", "winner": ...}` when the match ends. Players send `{"action": ...}` with one of
+    `GameEngine.ACTIONS`, which is applied at the next tick.
+
+    Attributes
+    ----------
+    host : str, default: '127.0.0.1'
+        The address to listen on.
+
+    port : int, default: 8765
+        The port to listen on, or 0 to pick a free one.
+
+    tick_duration : float, default: 0.01
+        The number of seconds in a tick, shared by every match.
+
+    state_interval : int, default: 5
+        The fewest ticks between frames sent to a match's players and spectators.
+
+    keyframe_interval : int, default: 500
+        The most ticks between keyframes in each game's stream.
+
+    engine_options : dict, optional
+        Keyword arguments for every `GameEngine`. Games resolve chains one gravity step at a time by default.
+
+    seed : int, optional
+        The seed of the random number generator choosing each match's seed.
+
+    matches : dict
+        Every running `Match`, by id.
+
+    waiting_player : Player
+        The player waiting for an opponent, or None.
+
+    scheduler : FixedTimestepScheduler
+        Keeps the server's ticks on time, dropping ticks rather than falling further behind when overloaded.
+
+    Notes
+    -----
+    Everything runs on the event loop's thread, so connections and the tick loop never race. A match's memory
+    is bounded by its two boards and its players' queues, and each tick's work is bounded by the number of matches,
+    since games with nothing due fast forward through idle ticks.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, tick_duration=0.01, state_interval=5, keyframe_interval=500,
+                 engine_options=None, seed=None):
+        self.host = host
+        self.port = port
+        self.tick_duration = tick_duration
+        self.state_interval = state_interval
+        self.keyframe_interval = keyframe_interval
+        self.engine_options = {'instant_gravity': False}
+        self.engine_options.update(engine_options or {})
+        self.random = random.Random(seed)
+
+        self.matches = {}
+        self.waiting_player = None
+        self.num_matches_started = 0
+        self.last_state_tick = 0
+        self.scheduler = None
+        self.server = None
+        self.tick_task = None
+
+    async def start(self):
+        """
+        Start listening for clients and running the tick loop on the current event loop.
+        """
+
+        loop = asyncio.get_running_loop()
+        self.scheduler = FixedTimestepScheduler(self.tick_duration, clock=loop.time)
+        self.scheduler.start()
+
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=MAX_LINE_BYTES,
+                                                 backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.tick_task = loop.create_task(self.run_ticks())
+
+    async def close(self):
+        """
+        Stop accepting clients, stop the tick loop, and disconnect everyone.
+        """
+
+        self.server.close()
+        self.tick_task.cancel()
+        for match in list(self.matches.values()):
+            self.end_match(match)
+            for player in match.players + match.spectators:
+                player.writer.close()
+        if self.waiting_player is not None:
+            self.waiting_player.writer.close()
+            self.waiting_player = None
+        await self.server.wait_closed()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Match up or start streaming to a new client, then queue their actions until they disconnect.
+        """
+
+        player = Player(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break
+                if not line:
+                    break
+
+                try:
+                    message = json.loads(line)
+                    if 'play' in message:
+                        self.add_player(player)
+                        continue
+                    if 'watch' in message:
+                        self.watch_match(player, message['watch'])
+                        continue
+                    action = message['action']
+                except (ValueError, KeyError, TypeError):
+                    player.send({'type': 'error', 'message': "expected {\"play\": ...}, {\"watch\": ...}, "
+                                                             "or {\"action\": ...}"})
+                    continue
+                if action not in GameEngine.ACTIONS:
+                    player.send({'type': 'error', 'message': "unknown action: " + str(action)})
+                    continue
+                if player.match is not None and not player.match.finished and not player.spectating:
+                    player.actions.append(action)
+        finally:
+            player.connected = False
+            if self.waiting_player is player:
+                self.waiting_player = None
+            if player.spectating and player in player.match.spectators:
+                player.match.spectators.remove(player)
+            writer.close()
+
+    def add_player(self, player: Player):
+        """
+        Start a match with the waiting player, or wait for an opponent.
+        """
+
+        if player.match is not None or self.waiting_player is player:
+            player.send({'type': 'error', 'message': "already playing or watching"})
+            return
+
+        if self.waiting_player is None or not self.waiting_player.connected:
+            self.waiting_player = player
+            player.send({'type': 'waiting'})
+            return
+
+        players = [self.waiting_player, player]
+        self.waiting_player = None
+        self.num_matches_started += 1
+
+        match = Match(self.num_matches_started, players, self.scheduler.current_tick,
+                      self.random.getrandbits(64), self.engine_options, self.keyframe_interval)
+        self.matches[match.match_id] = match
+        for player in players:
+            player.send({'type': 'start', 'match': match.match_id, 'player': player.index, 'seed': match.seed,
+                         'width': match.engines[0].board.width, 'height': match.engines[0].board.height})
+
+    def watch_match(self, player: Player, match_id: int):
+        """
+        Make a client that isn't playing spectate a match.
+        """
+
+        match = self.matches.get(match_id)
+        if match is None or player.match is not None or self.waiting_player is player:
+            player.send({'type': 'error', 'message': "can't watch match " + str(match_id)})
+            return
+
+        match.add_spectator(player)
+        player.send({'type': 'watching', 'match': match_id,
+                     'width': match.engines[0].board.width, 'height': match.engines[0].board.height})
+
+    def end_match(self, match: Match):
+        """
+        Tell both players who won and stop sending to them.
+        """
+
+        del self.matches[match.match_id]
+        match.send_state()
+        for player in match.players + match.spectators:
+            player.send({'type': 'over', 'winner': match.winner})
+
+            # only close the sending side, so actions the client sent before hearing the match is over
+            # don't reset the connection and lose the message
+            if player.connected and player.writer.can_write_eof():
+                player.writer.write_eof()
+            player.connected = False
+
+    def tick(self, tick: int):
+        """
+        Run every match up to a server tick.
+        """
+
+        send_states = tick - self.last_state_tick >= self.state_interval
+        if send_states:
+            self.last_state_tick = tick
+
+        for match in list(self.matches.values()):
+            match.advance(tick)
+            if match.finished:
+                self.end_match(match)
+            elif send_states:
+                match.send_state()
+
+    async def run_ticks(self):
+        """
+        Run every match on time, one tick at a time, until cancelled.
+        """
+
+        scheduler = self.scheduler
+        while True:
+            self.tick(scheduler.get_due_tick())
+            timeout = scheduler.get_time_until_tick(scheduler.current_tick)
+            await asyncio.sleep(max(0.0, timeout))
+
+async def play_random_client(host: str, port: int, seed=None, actions_per_second=10) -> dict:
+    """
+    Connect to a server as a client pressing random keys, for trying out and load testing a server locally.
+
+    Returns
+    -------
+    dict
+        The server's `over` message.
+    """
+
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"play": true}\n')
+
+    async def press_keys():
+        while True:
+            await asyncio.sleep(rng.expovariate(actions_per_second))
+            action = rng.choice(('move left', 'move right', 'rotate left', 'rotate right', 'hard drop'))
+            writer.write((json.dumps({'action': action}) + '\n').encode())
+
+    pressing_task = None
+    message = {'type': 'over', 'winner': None}
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ConnectionError:
+                break
+            if not line:
+                break
+            message = json.loads(line)
+            if message['type'] == 'start':
+                pressing_task = asyncio.get_running_loop().create_task(press_keys())
+            elif message['type'] == 'over':
+                break
+    finally:
+        if pressing_task is not None:
+            pressing_task.cancel()
+        writer.close()
+
+    return message
+
+async def serve(host: str, port: int, num_clients=0):
+    """
+    Run a server until the process is stopped, with `num_clients` local random clients playing on it
+    for as long as they have matches.
+    """
+
+    server = GameServer(host, port)
+    await server.start()
+    print("Serving JellyBlocker matches on " + host + ":" + str(server.port), flush=True)
+
+    if num_clients > 0:
+        await asyncio.gather(*(play_random_client(host, server.port, seed) for seed in range(num_clients)))
+        print("Scheduler dropped " + str(server.scheduler.num_dropped_ticks) + " ticks", flush=True)
+    await asyncio.Event().wait()
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Host JellyBlocker versus matches over TCP, one JSON object per line.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--clients', type=int, default=0, help="the number of local random clients to play")
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.host, args.port, args.clients))
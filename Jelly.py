@@ -9,6 +9,11 @@ class Jelly(Enum):
     PURPLE = '🌚'
     YELLOW = '🌝'
 
+# every jelly color is stored on the board as a small integer code, with the falling flag in the top bit
+JELLY_CODES = {jelly: code for code, jelly in enumerate(Jelly)}
+CODE_JELLIES = list(Jelly)
+FALLING_FLAG = 0x80
+
 class JellyBlock:
     """
     A single jelly block.
@@ -26,10 +31,74 @@ class JellyBlock:
 
     col : int, default: 0
         The column of the board that the jelly block is in.
+
+    code : int
+        The color as its code from `JELLY_CODES`, which is what's stored. `color` converts to and from it.
+
+    cell_code : int
+        The code as it's stored in a board's cells.
     """
 
+    __slots__ = ('code', 'falling', 'row', 'col')
+
     def __init__(self, color=Jelly.EMPTY, falling=False, row=-10, col=-10):
-        self.color = color
+        self.code = JELLY_CODES[color]
         self.falling = falling
         self.row = row
-        self.col = col
\ No newline at end of file
+        self.col = col
+
+    @classmethod
+    def from_code(cls, code: int, falling=False, row=-10, col=-10) -> "JellyBlock":
+        """
+        Create a jelly block from a color code, without looking up the `Jelly`.
+        """
+
+        jelly = cls.__new__(cls)
+        jelly.code = code
+        jelly.falling = falling
+        jelly.row = row
+        jelly.col = col
+        return jelly
+
+    @property
+    def color(self) -> Jelly:
+        return CODE_JELLIES[self.code]
+
+    @color.setter
+    def color(self, color: Jelly):
+        self.code = JELLY_CODES[color]
+
+    @property
+    def cell_code(self) -> int:
+        """
+        The code as it's stored in a board's cells, with `FALLING_FLAG` set if the jelly is falling.
+        """
+
+        return self.code | FALLING_FLAG if self.falling else self.code
+
+class EmptyJellyBlock(JellyBlock):
+    """
+    The type of `EMPTY_JELLY`, which can't be changed.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EMPTY_JELLY is shared by every empty cell and can't be changed")
+
+    # copying or unpickling would set attributes on a new jelly block, so they return the shared one instead
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return 'EMPTY_JELLY'
+
+# every empty cell viewed through `Board.board` or `Board.get_jelly` is this one shared jelly block
+EMPTY_JELLY = EmptyJellyBlock.__new__(EmptyJellyBlock)
+object.__setattr__(EMPTY_JELLY, 'code', JELLY_CODES[Jelly.EMPTY])
+object.__setattr__(EMPTY_JELLY, 'falling', False)
+object.__setattr__(EMPTY_JELLY, 'row', -10)
+object.__setattr__(EMPTY_JELLY, 'col', -10)
@@ -1,10 +1,11 @@
-from time import sleep
+import asyncio
 
-from Board import Board
-            
-class JellyBlocker:
+from AsyncDriver import AsyncGame
+from GameEngine import GameEngine
+
+class JellyBlocker(GameEngine):
     """
-    Controls user input, starting, and stopping the program.
+    Controls user input, starting, and stopping the program, running the game rules in real time.
 
     Attributes
     ----------
@@ -16,7 +17,7 @@ class JellyBlocker:
 
     gravity_speed : int, default: 20
         The time interval between falls for jellies affected by gravity in hundredths of seconds.
-    
+
     num_pops_to_level : int, default: 50
         The number of jellies to pop before leveling up the difficulty.
 
@@ -25,145 +26,65 @@ class JellyBlocker:
 
     fast_drop_multiplier : int, default: 5
         How much the falling speed should be multiplied when fast drop is active.
+
+    instant_gravity : bool, default: False
+        Whether jellies affected by gravity land immediately instead of falling one row every `gravity_speed`.
+
+    game : AsyncGame
+        The game `run_game` is running, for posting actions to from other threads, or None.
     """
 
-    def __init__(self, 
-                 board=Board(),
+    def __init__(self,
+                 board=None,
                  num_landed_iterations_before_placement=5,
                  gravity_speed=20,
                  num_pops_to_level=50,
                  falling_speed=100,
-                 fast_drop_multiplier=5
+                 fast_drop_multiplier=5,
+                 instant_gravity=False
                  ):
-        self.board = board
-        self.num_landed_iterations_before_placement = num_landed_iterations_before_placement
-        self.gravity_speed = gravity_speed
-        self.num_pops_to_level = num_pops_to_level
-        self.falling_speed = falling_speed
-        self.fast_drop_multiplier = fast_drop_multiplier
+        super().__init__(board,
+                         num_landed_iterations_before_placement,
+                         gravity_speed,
+                         num_pops_to_level,
+                         falling_speed,
+                         fast_drop_multiplier,
+                         instant_gravity)
 
         self.game_running = False
-        self.game_time = 0
-        self.points = 0
-        self.jellies_popped_stat = 0
-        self.level = 1
-        self.fast_drop = False
+        self.game = None
 
-    def set_board(self, board: Board):
+    def run_game(self, update_display=None, game_over=None, policy=None):
         """
-        Sets the board to a new board.
+        Start a new game and run it in real time until it finishes or is stopped, blocking the calling thread.
 
         Parameters
         ----------
-        board : Board
-            The new board to replace the old board with.
-        """
-
-        self.board = board
-
-    def get_falling_speed(self):
-        """
-        Calculates and returns falling speed based on `self.level` and `self.fast_drop_multiplier`.
+        update_display : function, optional
+            The function from the GUI to update the display whenever something on the board changes.
 
-        Returns
-        -------
-        int
-            The calculated falling speed.
-        """
+        game_over : function, optional
+            The function from the GUI to execute when the game is over.
 
-        if self.fast_drop:
-            return self.falling_speed // self.level // self.fast_drop_multiplier
-        return self.falling_speed // self.level
+        policy : function, optional
+            Called with this engine before every tick to get an action to apply, such as a `Bot.BotPlayer`.
 
-    def run_game(self, update_display, game_over):
+        Notes
+        -----
+        The game runs as an `AsyncGame` on its own event loop, the same driver `CommandLineGUI` uses.
+        Other threads send it actions, including `None` to stop it, with `self.game.post_action`.
         """
-        Runs the game until the user hits the game finishes
 
-        Parameters
-        ----------
-        update_display : function
-            The function from the GUI to update the display whenever something on the board changes.
+        # create a new board and add the first falling group to it
+        self.reset()
 
-        game_over : function
-            The function from the GUI to execute when the game is over.
-        """
+        def end_game():
+            self.game_running = False
+            if game_over is not None:
+                game_over()
 
-        # create a new board
-        self.set_board(Board())
-
-        # add the first falling group to the board
-        self.board.add_falling_group_to_board()
-
-        # loop until the game is over
-        count_iterations_without_change = 0
-        count_iterations_without_moving_down = 0
-        prev_row = 0
-        prev_col = 0
-
-        while self.game_running:
-
-            if self.game_time % self.get_falling_speed() == 0:
-                
-                # move the falling group down
-                # if the falling group didn't move down, tick the counter up
-                if not self.board.move_falling_group_down():
-                    count_iterations_without_moving_down += 1
-                else:
-                    count_iterations_without_moving_down = 0
-
-                # if the falling group hasn't moved since last iteration, tick the counter up
-                if prev_row == self.board.current_falling_group[0].row and prev_col == self.board.current_falling_group[0].col:
-                    count_iterations_without_change += 1
-                else:
-                    count_iterations_without_change = 0
-
-                # if the falling group hasn't been moved for `num_landed_iterations_before_placement // 2` iterations, place it
-                # if the falling group hasn't moved down in `num_landed_iterations_before_placement` iterations, place it
-                if count_iterations_without_change >= self.num_landed_iterations_before_placement // 2 or \
-                   count_iterations_without_moving_down >= self.num_landed_iterations_before_placement:
-                    
-                    # place the current falling group, get a new one, and pop jellies
-                    if not self.board.cycle_falling_groups():
-                        self.game_running = False
-                        game_over()
-                        return
-
-                    total_jellies_popped = 0
-                    popping_chain = -1
-
-                    # emulating do-while loop, look at the break condition at the bottom of the loop
-                    while True:
-
-                        # apply gravity until all jellies are on the ground
-                        board_changed = True
-                        while board_changed:
-                            update_display()
-                            board_changed = self.board.apply_gravity()
-                            sleep(self.gravity_speed / 100)
-
-                        # pop any jellies that are now in large enough groups
-                        num_jellies_popped = self.board.pop_jellies()
-                        total_jellies_popped += num_jellies_popped
-                        self.jellies_popped_stat += num_jellies_popped
-                        popping_chain += 2
-
-                        if num_jellies_popped == 0:
-                            break
-                        num_jellies_popped = 0
-
-                        # if enough jellies have been popped to level up, level up
-                        if self.jellies_popped_stat >= self.num_pops_to_level * self.level:
-                            self.level += 1
-                    
-                        # this is how points are calculated, given to the user after every pop in a chain
-                        self.points += total_jellies_popped * popping_chain
-
-                    count_iterations_without_change = 0
-                    count_iterations_without_moving_down = 0
-
-                prev_row = self.board.current_falling_group[0].row
-                prev_col = self.board.current_falling_group[0].col
-                update_display()
-
-            sleep(0.01)
-            self.game_time += 1
\ No newline at end of file
+        self.game = AsyncGame(self, update_display, end_game, policy)
+        try:
+            asyncio.run(self.game.run())
+        finally:
+            self.game = None
@@ -0,0 +1,230 @@
+"""
+Reinforcement learning environments over the `Board` rules, with NumPy observations that view the boards' cells
+"""
+
+import random
+
+import numpy as np
+
+from Board import Board
+from Bot import ROTATIONS, Bot, resolve_chain
+
+class JellyEnv:
+    """
+    One game played a placement at a time, in the style of a gym environment.
+
+    Each action is a rotation from `Bot.ROTATIONS` and a column, `rotation * width + col`. The falling group is
+    rotated, dropped with its leftmost jelly in the column, and placed, and the reward is the points its chain scored.
+
+    Attributes
+    ----------
+    board_options : dict, optional
+        Keyword arguments for every `Board`, other than `seed` and `cells`.
+
+    max_steps : int, optional
+        The number of placements after which a game is truncated even if it isn't over.
+
+    seed : int, optional
+        The seed of the random number generator choosing each game's seed when `reset` isn't given one.
+
+    cells : numpy.ndarray, optional
+        The `uint8` array of `height * width` elements to store every game's cells in, such as a row of a
+        `VecEnv`'s observations. A new one is made if not given.
+
+    observation : numpy.ndarray
+        The cells as a `(height, width)` array of jelly codes, with `FALLING_FLAG` set on the falling group.
+        It is the board's own storage, so it always shows the current state without being rebuilt.
+
+    board : Board
+        The current game's board, or None before `reset`.
+
+    num_actions : int
+        The number of actions.
+
+    Notes
+    -----
+    Every game is stored in the same array, so `observation` stays valid across resets. Copy it to keep an
+    observation after the next step.
+    """
+
+    def __init__(self, board_options=None, max_steps=None, seed=None, cells=None):
+        self.board_options = dict(board_options or {})
+        self.max_steps = max_steps
+        self.random = random.Random(seed)
+
+        self.width = self.board_options.get('width', 6)
+        self.height = self.board_options.get('height', 13)
+        if cells is None:
+            cells = np.zeros(self.width * self.height, dtype=np.uint8)
+        self.observation = cells.reshape(self.height, self.width)
+
+        self.board = None
+        self.num_steps = 0
+        self.num_actions = len(ROTATIONS) * self.width
+
+    def reset(self, seed=None) -> tuple:
+        """
+        Start a new game.
+
+        Parameters
+        ----------
+        seed : int, optional
+            The seed of the game's falling groups. One is chosen from the environment's seed if not given.
+
+        Returns
+        -------
+        tuple
+            `(observation, info)`, where `info` has the codes of the next falling group.
+        """
+
+        if seed is None:
+            seed = self.random.getrandbits(64)
+
+        self.board = Board(**self.board_options, seed=seed, cells=self.observation)
+        self.board.add_falling_group_to_board()
+        self.num_steps = 0
+        return self.observation, self.get_info()
+
+    def step(self, action: int) -> tuple:
+        """
+        Place the falling group and resolve its chain.
+
+        Parameters
+        ----------
+        action : int
+            `rotation * width + col`. A column the rotated group can't reach is moved to the nearest one it can.
+
+        Returns
+        -------
+        tuple
+            `(observation, reward, terminated, truncated, info)`. `terminated` is whether the game is over,
+            `truncated` whether `max_steps` was reached, and `info` has the codes of the next falling group,
+            whether the action's column was reachable, and the length of the chain.
+        """
+
+        board = self.board
+        rotation, col = divmod(action, self.width)
+        for rotation_action in ROTATIONS[rotation]:
+            Bot.apply_action(board, rotation_action)
+
+        min_col, max_col = board.get_reachable_cols()
+        board.drop_falling_group_at(min(max(col, min_col), max_col))
+        self.num_steps += 1
+
+        reward = 0
+        chain = 0
+        terminated = not board.cycle_falling_groups()
+        if not terminated:
+            reward, _, chain = resolve_chain(board)
+        truncated = self.max_steps is not None and self.num_steps >= self.max_steps
+
+        info = self.get_info()
+        info['valid'] = min_col <= col <= max_col
+        info['chain'] = chain
+        return self.observation, reward, terminated, truncated, info
+
+    def get_info(self) -> dict:
+        """
+        Get the information about the game that isn't in the observation.
+        """
+
+        return {'next_group': [jelly.code for jelly in self.board.next_falling_group]}
+
+class VecEnv:
+    """
+    Many `JellyEnv`s stepped together, whose observations are the rows of one shared array.
+
+    Attributes
+    ----------
+    num_envs : int
+        The number of environments.
+
+    board_options, max_steps
+        Passed to every `JellyEnv`.
+
+    seed : int, optional
+        The seed of the first environment's random number generator. The others count up from it.
+
+    observations : numpy.ndarray
+        The `(num_envs, height, width)` array every environment stores its cells in.
+
+    envs : list
+        The `JellyEnv`s.
+
+    points : numpy.ndarray
+        The points each environment's current game has scored.
+
+    Notes
+    -----
+    An environment whose game ends is reset straight away, like other vectorized environments, so its row of
+    `observations` holds the start of its next game. Its final points are in its `info`.
+    """
+
+    def __init__(self, num_envs: int, board_options=None, max_steps=None, seed=None):
+        self.num_envs = num_envs
+        board_options = board_options or {}
+        width = board_options.get('width', 6)
+        height = board_options.get('height', 13)
+
+        self.observations = np.zeros((num_envs, height, width), dtype=np.uint8)
+        self.envs = [JellyEnv(board_options, max_steps, None if seed is None else seed + index,
+                              self.observations[index])
+                     for index in range(num_envs)]
+        self.rewards = np.zeros(num_envs, dtype=np.int64)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self.points = np.zeros(num_envs, dtype=np.int64)
+
+    @property
+    def num_actions(self) -> int:
+        return self.envs[0].num_actions
+
+    def reset(self, seeds=None) -> tuple:
+        """
+        Start a new game in every environment.
+
+        Parameters
+        ----------
+        seeds : list, optional
+            The seed of each environment's game.
+
+        Returns
+        -------
+        tuple
+            `(observations, infos)`, with an info dict per environment.
+        """
+
+        infos = [env.reset(None if seeds is None else seeds[index])[1] for index, env in enumerate(self.envs)]
+        self.points[:] = 0
+        return self.observations, infos
+
+    def step(self, actions) -> tuple:
+        """
+        Step every environment with its action, resetting the ones whose games end.
+
+        Parameters
+        ----------
+        actions : sequence
+            An action for each environment.
+
+        Returns
+        -------
+        tuple
+            `(observations, rewards, terminated, truncated, infos)`, where `rewards`, `terminated` and `truncated`
+            are arrays with an element per environment. The arrays are reused by the next step.
+        """
+
+        infos = []
+        for index, (env, action) in enumerate(zip(self.envs, actions)):
+            _, reward, terminated, truncated, info = env.step(int(action))
+            self.points[index] += reward
+            if terminated or truncated:
+                info['final_points'] = int(self.points[index])
+                self.points[index] = 0
+                info.update(env.reset()[1])
+            self.rewards[index] = reward
+            self.terminated[index] = terminated
+            self.truncated[index] = truncated
+            infos.append(info)
+
+        return self.observations, self.rewards, self.terminated, self.truncated, infos
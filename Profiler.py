@@ -0,0 +1,285 @@
+"""
+Opt-in timing of the game's hot paths, with latency histograms and tick overrun counts that can be dumped as JSON
+"""
+
+import atexit
+import json
+from functools import wraps
+from time import perf_counter_ns
+
+from Board import Board
+from GameEngine import GameEngine
+from Scheduler import FixedTimestepScheduler
+
+# the methods timed by `enable`, by class
+DEFAULT_TARGETS = [
+    (Board, ['pop_jellies', 'apply_gravity', 'settle', 'hard_drop', 'cycle_falling_groups',
+             'move_falling_group_left', 'move_falling_group_right', 'move_falling_group_down',
+             'rotate_falling_group_left', 'rotate_falling_group_right']),
+    (GameEngine, ['step']),
+]
+
+def get_bucket(duration: int) -> int:
+    """
+    Get the histogram bucket of a duration in nanoseconds. Each power of two is split into four buckets,
+    so every bucket is within 25% of its upper bound.
+    """
+
+    num_bits = duration.bit_length()
+    if num_bits <= 2:
+        return duration
+    return num_bits << 2 | (duration >> (num_bits - 3)) & 3
+
+def get_bucket_upper_bound(bucket: int) -> int:
+    """
+    Get the largest duration in nanoseconds, plus one, that falls in a bucket from `get_bucket`.
+    """
+
+    if bucket < 4:
+        return bucket + 1
+    num_bits = bucket >> 2
+    return (4 + (bucket & 3) + 1) << (num_bits - 3)
+
+class LatencyHistogram:
+    """
+    Counts how long calls took in logarithmic buckets, so percentiles can be estimated in constant memory.
+
+    Attributes
+    ----------
+    counts : dict
+        The number of calls in each bucket from `get_bucket`.
+
+    num_calls : int
+        The number of calls recorded.
+
+    total_duration : int
+        The total time of every call in nanoseconds.
+
+    max_duration : int
+        The longest call in nanoseconds.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Forget every recorded call.
+        """
+
+        self.counts = {}
+        self.num_calls = 0
+        self.total_duration = 0
+        self.max_duration = 0
+
+    def record(self, duration: int):
+        """
+        Record a call that took `duration` nanoseconds.
+        """
+
+        bucket = get_bucket(duration)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.num_calls += 1
+        self.total_duration += duration
+        if duration > self.max_duration:
+            self.max_duration = duration
+
+    def get_percentile(self, percentile: float) -> int:
+        """
+        Estimate a percentile of the recorded durations.
+
+        Parameters
+        ----------
+        percentile : float
+            The percentile, from 0 to 100.
+
+        Returns
+        -------
+        int
+            The upper bound in nanoseconds of the bucket the percentile falls in, or 0 if nothing was recorded.
+        """
+
+        if self.num_calls == 0:
+            return 0
+
+        rank = percentile / 100 * self.num_calls
+        num_calls_below = 0
+        for bucket in sorted(self.counts):
+            num_calls_below += self.counts[bucket]
+            if num_calls_below >= rank:
+                return min(get_bucket_upper_bound(bucket), self.max_duration)
+        return self.max_duration
+
+    def to_dict(self) -> dict:
+        """
+        Summarize the histogram, with durations in microseconds.
+        """
+
+        return {
+            'calls': self.num_calls,
+            'total_ms': self.total_duration / 1e6,
+            'mean_us': self.total_duration / self.num_calls / 1e3 if self.num_calls > 0 else 0.0,
+            'p50_us': self.get_percentile(50) / 1e3,
+            'p99_us': self.get_percentile(99) / 1e3,
+            'max_us': self.max_duration / 1e3,
+            'histogram_us': {str(get_bucket_upper_bound(bucket) / 1e3): count
+                             for bucket, count in sorted(self.counts.items())},
+        }
+
+class Profiler:
+    """
+    Times methods by wrapping them on their classes, and counts how many real-time ticks ran late.
+
+    Attributes
+    ----------
+    histograms : dict
+        A `LatencyHistogram` for every timed method, keyed by `'Class.method'`.
+
+    num_ticks : int
+        The number of ticks run by any `FixedTimestepScheduler` while profiling.
+
+    num_overrun_ticks : int
+        The number of those ticks that ran late because the previous work overran, or were dropped.
+
+    Notes
+    -----
+    Nothing is wrapped until `instrument` is called, so the game runs its normal methods with no
+    overhead at all unless profiling was turned on.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.num_ticks = 0
+        self.num_overrun_ticks = 0
+        self.originals = []
+
+    def instrument(self, cls, method_names: list):
+        """
+        Time every call of some methods of a class, on every instance.
+
+        Parameters
+        ----------
+        cls : type
+            The class the methods are defined on.
+
+        method_names : list
+            The names of the methods to time.
+        """
+
+        for method_name in method_names:
+            method = cls.__dict__[method_name]
+            histogram = self.histograms.setdefault(cls.__name__ + '.' + method_name, LatencyHistogram())
+            setattr(cls, method_name, self._wrap(method, histogram))
+            self.originals.append((cls, method_name, method))
+
+    @staticmethod
+    def _wrap(method, histogram: LatencyHistogram):
+        """
+        Wrap a method so each call's duration is recorded in a histogram.
+        """
+
+        @wraps(method)
+        def timed_method(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.record(perf_counter_ns() - start)
+
+        return timed_method
+
+    def instrument_scheduler(self):
+        """
+        Count the ticks every `FixedTimestepScheduler` runs, and how many of them overran.
+        """
+
+        get_due_tick = FixedTimestepScheduler.__dict__['get_due_tick']
+
+        @wraps(get_due_tick)
+        def counted_get_due_tick(scheduler):
+            prev_tick = scheduler.current_tick
+            expected_due_tick = scheduler.expected_due_tick
+            prev_num_dropped_ticks = scheduler.num_dropped_ticks
+
+            due_tick = get_due_tick(scheduler)
+
+            # ticks due after the one the scheduler meant to wake for ran late, and dropped ticks never ran
+            num_dropped_ticks = scheduler.num_dropped_ticks - prev_num_dropped_ticks
+            self.num_ticks += due_tick - prev_tick + num_dropped_ticks
+            self.num_overrun_ticks += max(0, due_tick - expected_due_tick) + num_dropped_ticks
+            return due_tick
+
+        FixedTimestepScheduler.get_due_tick = counted_get_due_tick
+        self.originals.append((FixedTimestepScheduler, 'get_due_tick', get_due_tick))
+
+    def uninstrument(self):
+        """
+        Put back every method that was wrapped, keeping what was recorded.
+        """
+
+        for cls, method_name, method in reversed(self.originals):
+            setattr(cls, method_name, method)
+        self.originals = []
+
+    def reset(self):
+        """
+        Forget everything recorded so far, and keep profiling.
+        """
+
+        for histogram in self.histograms.values():
+            histogram.clear()
+        self.num_ticks = 0
+        self.num_overrun_ticks = 0
+
+    def to_dict(self) -> dict:
+        """
+        Summarize every timed method and the tick overrun rate.
+        """
+
+        return {
+            'methods': {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+            'ticks': {
+                'ticks': self.num_ticks,
+                'overrun_ticks': self.num_overrun_ticks,
+                'overrun_rate': self.num_overrun_ticks / self.num_ticks if self.num_ticks > 0 else 0.0,
+            },
+        }
+
+    def dump(self, path: str):
+        """
+        Write the summary from `to_dict` to a JSON file.
+        """
+
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+# the profiler used by `enable`
+PROFILER = Profiler()
+
+def enable(dump_path=None, extra_targets=()) -> Profiler:
+    """
+    Start profiling the game's hot paths with `PROFILER`.
+
+    Parameters
+    ----------
+    dump_path : str, optional
+        A JSON file to dump the profile to when the program exits.
+
+    extra_targets : iterable, default: ()
+        More `(class, method_names)` pairs to time, such as a GUI's drawing methods.
+
+    Returns
+    -------
+    Profiler
+        `PROFILER`, which can also be dumped on demand.
+    """
+
+    if not PROFILER.originals:
+        for cls, method_names in list(DEFAULT_TARGETS) + list(extra_targets):
+            PROFILER.instrument(cls, method_names)
+        PROFILER.instrument_scheduler()
+
+        if dump_path is not None:
+            atexit.register(PROFILER.dump, dump_path)
+
+    return PROFILER
@@ -0,0 +1,110 @@
+"""
+Redraws a game at a capped frame rate on its own schedule, writing frames on a separate thread
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from GameEngine import GameEngine
+
+class RenderStage:
+    """
+    Polls a game's published `snapshot` a fixed number of times a second and draws it when it changed,
+    so drawing never runs inside a tick and a slow terminal never holds up the game.
+
+    Attributes
+    ----------
+    engine : GameEngine
+        The game to draw.
+
+    draw_snapshot : function
+        Called on the writer thread with a `GameEngine.GameSnapshot` to draw it.
+
+    max_fps : int, default: 30
+        The most frames to draw per second.
+
+    Notes
+    -----
+    Only the snapshot is handed to the writer thread, and snapshots are never changed once published, so the
+    writer never reads the game while it is being changed and the game thread never waits for the writer.
+
+    Frames are written in order by a single writer thread. If the writer is still busy with the last frame
+    when the next one is due, that frame is skipped, and the latest state is drawn once the writer is free.
+    Anything else that writes to the same output should go through `run_in_writer` to stay in order with the frames.
+    """
+
+    def __init__(self, engine: GameEngine, draw_snapshot, max_fps=30):
+        self.engine = engine
+        self.draw_snapshot = draw_snapshot
+        self.max_fps = max_fps
+
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        self.loop = None
+        self.task = None
+        self.pending_write = None
+        self.drawn_version = None
+
+    def start(self) -> asyncio.Task:
+        """
+        Start drawing on the current event loop.
+
+        Returns
+        -------
+        asyncio.Task
+            The task polling the game.
+        """
+
+        self.loop = asyncio.get_running_loop()
+        self.task = self.loop.create_task(self.run())
+        return self.task
+
+    async def run(self):
+        """
+        Draw the game's latest snapshot every `1 / max_fps` seconds, whenever it changed.
+        """
+
+        while True:
+            self.draw_latest()
+            await asyncio.sleep(1 / self.max_fps)
+
+    def draw_latest(self, skip_if_busy=True):
+        """
+        Hand the game's latest snapshot to the writer thread, if it changed since it was last drawn.
+
+        Parameters
+        ----------
+        skip_if_busy : bool, default: True
+            Whether to skip drawing while the writer is still busy with the last frame, instead of queueing the frame.
+        """
+
+        if skip_if_busy and self.pending_write is not None and not self.pending_write.done():
+            return
+        snapshot = self.engine.snapshot
+        if snapshot is None or snapshot.version == self.drawn_version:
+            return
+
+        self.drawn_version = snapshot.version
+        self.pending_write = self.run_in_writer(self.draw_snapshot, snapshot)
+
+    def run_in_writer(self, function, *args) -> asyncio.Future:
+        """
+        Call a function on the writer thread, after every frame already handed to it.
+
+        Returns
+        -------
+        asyncio.Future
+            The function's result.
+        """
+
+        return self.loop.run_in_executor(self.writer, function, *args)
+
+    async def close(self):
+        """
+        Stop drawing, draw the latest snapshot, and wait for the writer to finish.
+        """
+
+        if self.task is not None:
+            self.task.cancel()
+        self.draw_latest(skip_if_busy=False)
+        await self.run_in_writer(lambda: None)
+        self.writer.shutdown()
@@ -0,0 +1,305 @@
+"""
+Records games as a seed plus tick-stamped inputs, and re-simulates them to verify their scores
+"""
+
+from Board import Board
+from GameEngine import GameEngine
+
+REPLAY_MAGIC = b'JBR1'
+
+def encode_varint(value: int, buffer: bytearray):
+    """
+    Append a non-negative integer to `buffer` as a little-endian base-128 varint.
+    """
+
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def decode_varint(data, offset: int) -> tuple:
+    """
+    Read a varint written by `encode_varint`.
+
+    Returns
+    -------
+    tuple
+        `(value, offset)`, where `offset` is the position just after the varint.
+    """
+
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class Replay:
+    """
+    Everything needed to re-simulate a game: its settings, its seed, and the player's inputs.
+
+    Attributes
+    ----------
+    board_options : dict
+        The keyword arguments the game's `Board` was created with, including its seed.
+
+    engine_options : dict
+        The keyword arguments the game's `GameEngine` was created with.
+
+    inputs : list
+        A `(tick, action)` tuple for every action the player took, in order.
+
+    final_tick : int
+        The game time when the recording ended.
+
+    points : int
+        The points scored by the end of the recording.
+
+    max_chain : int
+        The longest popping chain in the game.
+    """
+
+    def __init__(self, board_options: dict, engine_options: dict, inputs=None, final_tick=0, points=0, max_chain=0):
+        self.board_options = board_options
+        self.engine_options = engine_options
+        self.inputs = inputs if inputs is not None else []
+        self.final_tick = final_tick
+        self.points = points
+        self.max_chain = max_chain
+
+    @classmethod
+    def from_engine(cls, engine: GameEngine) -> "Replay":
+        """
+        Create an empty replay with the settings of a game that has just been reset.
+        """
+
+        board = engine.board
+        return cls(
+            {
+                'width': board.width,
+                'height': board.height,
+                'num_colors': board.num_colors,
+                'possible_sizes': list(board.possible_sizes),
+                'num_connecting_jellies_to_pop': board.num_connecting_jellies_to_pop,
+                'seed': board.seed,
+            },
+            {
+                'num_landed_iterations_before_placement': engine.num_landed_iterations_before_placement,
+                'gravity_speed': engine.gravity_speed,
+                'num_pops_to_level': engine.num_pops_to_level,
+                'falling_speed': engine.falling_speed,
+                'fast_drop_multiplier': engine.fast_drop_multiplier,
+                'instant_gravity': engine.instant_gravity,
+            })
+
+    def to_bytes(self) -> bytes:
+        """
+        Encode the replay as varints.
+
+        Returns
+        -------
+        bytes
+            The encoded replay.
+
+        Notes
+        -----
+        Each input is stored as one varint holding the ticks since the previous input and the action's
+        index in `GameEngine.ACTIONS`, so a typical input takes one or two bytes.
+        """
+
+        buffer = bytearray(REPLAY_MAGIC)
+        encode_varint(self.board_options['width'], buffer)
+        encode_varint(self.board_options['height'], buffer)
+        encode_varint(self.board_options['num_colors'], buffer)
+        encode_varint(len(self.board_options['possible_sizes']), buffer)
+        for size in self.board_options['possible_sizes']:
+            encode_varint(size, buffer)
+        encode_varint(self.board_options['num_connecting_jellies_to_pop'], buffer)
+        encode_varint(self.board_options['seed'], buffer)
+
+        encode_varint(self.engine_options['num_landed_iterations_before_placement'], buffer)
+        encode_varint(self.engine_options['gravity_speed'], buffer)
+        encode_varint(self.engine_options['num_pops_to_level'], buffer)
+        encode_varint(self.engine_options['falling_speed'], buffer)
+        encode_varint(self.engine_options['fast_drop_multiplier'], buffer)
+        encode_varint(int(self.engine_options['instant_gravity']), buffer)
+
+        encode_varint(len(self.inputs), buffer)
+        prev_tick = 0
+        for tick, action in self.inputs:
+            encode_varint((tick - prev_tick) << 3 | GameEngine.ACTIONS.index(action), buffer)
+            prev_tick = tick
+
+        encode_varint(self.final_tick, buffer)
+        encode_varint(self.points, buffer)
+        encode_varint(self.max_chain, buffer)
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, data) -> "Replay":
+        """
+        Decode a replay written by `to_bytes`.
+
+        Parameters
+        ----------
+        data : bytes-like
+            The encoded replay.
+
+        Returns
+        -------
+        Replay
+            The decoded replay.
+        """
+
+        if bytes(data[:len(REPLAY_MAGIC)]) != REPLAY_MAGIC:
+            raise ValueError("Not a JellyBlocker replay")
+
+        offset = len(REPLAY_MAGIC)
+
+        def read():
+            nonlocal offset
+            value, offset = decode_varint(data, offset)
+            return value
+
+        board_options = {}
+        board_options['width'] = read()
+        board_options['height'] = read()
+        board_options['num_colors'] = read()
+        board_options['possible_sizes'] = [read() for _ in range(read())]
+        board_options['num_connecting_jellies_to_pop'] = read()
+        board_options['seed'] = read()
+
+        engine_options = {}
+        engine_options['num_landed_iterations_before_placement'] = read()
+        engine_options['gravity_speed'] = read()
+        engine_options['num_pops_to_level'] = read()
+        engine_options['falling_speed'] = read()
+        engine_options['fast_drop_multiplier'] = read()
+        engine_options['instant_gravity'] = bool(read())
+
+        inputs = []
+        tick = 0
+        for _ in range(read()):
+            value = read()
+            tick += value >> 3
+            inputs.append((tick, GameEngine.ACTIONS[value & 0x7]))
+
+        final_tick = read()
+        points = read()
+        max_chain = read()
+        return cls(board_options, engine_options, inputs, final_tick, points, max_chain)
+
+class ReplayRecorder:
+    """
+    Steps a game and records its inputs into a `Replay`.
+
+    Attributes
+    ----------
+    engine : GameEngine
+        The engine to record, which must have just been reset.
+
+    replay : Replay
+        The replay being recorded.
+    """
+
+    def __init__(self, engine: GameEngine):
+        self.engine = engine
+        self.replay = Replay.from_engine(engine)
+
+    def apply_action(self, action: str):
+        """
+        Record `action` at the current tick and apply it without stepping the engine.
+        """
+
+        self.replay.inputs.append((self.engine.game_time, action))
+        self.engine.apply_action(action)
+
+    def step(self, action=None) -> tuple:
+        """
+        Record `action` at the current tick, then step the engine.
+
+        Returns
+        -------
+        tuple
+            The result of `GameEngine.step`.
+        """
+
+        if action is not None:
+            self.replay.inputs.append((self.engine.game_time, action))
+
+        result = self.engine.step(action)
+        if result[2] > self.replay.max_chain:
+            self.replay.max_chain = result[2]
+        return result
+
+    def finish(self) -> Replay:
+        """
+        Record the end of the game.
+
+        Returns
+        -------
+        Replay
+            The finished replay.
+        """
+
+        self.replay.final_tick = self.engine.game_time
+        self.replay.points = self.engine.points
+        return self.replay
+
+def play_replay(replay: Replay, until_tick=None) -> tuple:
+    """
+    Re-simulate a replay as fast as possible, skipping ticks where nothing happens.
+
+    Parameters
+    ----------
+    replay : Replay
+        The replay to play.
+
+    until_tick : int, optional
+        The game time to stop at. The whole replay is played if not given.
+
+    Returns
+    -------
+    tuple
+        `(engine, max_chain)`: the engine at the end of the replay and the longest chain seen.
+    """
+
+    board = Board(**replay.board_options)
+    engine = GameEngine(board, **replay.engine_options)
+    engine.reset(board)
+
+    final_tick = replay.final_tick if until_tick is None else min(until_tick, replay.final_tick)
+
+    max_chain = 0
+    input_index = 0
+    while engine.game_time < final_tick and not engine.game_finished:
+        next_input_tick = replay.inputs[input_index][0] if input_index < len(replay.inputs) else final_tick
+        engine.fast_forward(min(next_input_tick, final_tick))
+        if engine.game_time >= final_tick:
+            break
+
+        # apply every input recorded for this tick before stepping it
+        action = None
+        while input_index < len(replay.inputs) and replay.inputs[input_index][0] == engine.game_time:
+            if action is not None:
+                engine.apply_action(action)
+            action = replay.inputs[input_index][1]
+            input_index += 1
+
+        _, _, chain, _, _ = engine.step(action)
+        if chain > max_chain:
+            max_chain = chain
+
+    return engine, max_chain
+
+def verify_replay(replay: Replay) -> bool:
+    """
+    Re-simulate a replay and check that it reaches the recorded tick, points and max chain.
+    """
+
+    engine, max_chain = play_replay(replay)
+    return engine.game_time == replay.final_tick and engine.points == replay.points and \
+        max_chain == replay.max_chain
@@ -0,0 +1,237 @@
+"""
+An append-only file of many replays, with a fixed-width index read through mmap
+"""
+
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from Replay import Replay, play_replay
+
+INDEX_MAGIC = b'JBRI'
+INDEX_HEADER_SIZE = 8
+INDEX_ENTRY = struct.Struct('<QQIQI')
+
+ArchiveEntry = namedtuple('ArchiveEntry', ['game_id', 'offset', 'length', 'points', 'max_chain'])
+
+def get_index_path(path: str) -> str:
+    """
+    Get the path of the index file kept next to an archive.
+    """
+
+    return path + '.idx'
+
+class ReplayArchiveWriter:
+    """
+    Appends replays to an archive and its index.
+
+    Attributes
+    ----------
+    path : str
+        The path of the archive. The index is written to `path + '.idx'`.
+
+    Notes
+    -----
+    Each replay is written to the archive before its index entry, so a crash never leaves an
+    index entry pointing past the end of the archive.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data_file = open(path, 'ab')
+        self.index_file = open(get_index_path(path), 'ab')
+
+        index_size = self.index_file.seek(0, os.SEEK_END)
+        if index_size == 0:
+            self.index_file.write(INDEX_MAGIC + struct.pack('<I', INDEX_ENTRY.size))
+            self.next_game_id = 0
+        else:
+            with open(get_index_path(path), 'rb') as index_file:
+                if index_file.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                    raise ValueError("Not a JellyBlocker replay archive index: " + get_index_path(path))
+                num_entries = (index_size - INDEX_HEADER_SIZE) // INDEX_ENTRY.size
+                if num_entries > 0:
+                    index_file.seek(INDEX_HEADER_SIZE + (num_entries - 1) * INDEX_ENTRY.size)
+                    self.next_game_id = INDEX_ENTRY.unpack(index_file.read(INDEX_ENTRY.size))[0] + 1
+                else:
+                    self.next_game_id = 0
+
+    def append(self, replay: Replay, game_id=None) -> int:
+        """
+        Append a replay to the archive.
+
+        Parameters
+        ----------
+        replay : Replay
+            The replay to append.
+
+        game_id : int, optional
+            The id of the game, which must be larger than every id already in the archive.
+            The next id after the last one is used if not given.
+
+        Returns
+        -------
+        int
+            The id of the game.
+        """
+
+        if game_id is None:
+            game_id = self.next_game_id
+        elif game_id < self.next_game_id:
+            raise ValueError("Game ids must increase, got " + str(game_id) + " after " + str(self.next_game_id - 1))
+
+        data = replay.to_bytes()
+        offset = self.data_file.seek(0, os.SEEK_END)
+        self.data_file.write(data)
+        self.data_file.flush()
+
+        self.index_file.write(INDEX_ENTRY.pack(game_id, offset, len(data), replay.points, replay.max_chain))
+        self.index_file.flush()
+
+        self.next_game_id = game_id + 1
+        return game_id
+
+    def close(self):
+        """
+        Close the archive and its index.
+        """
+
+        self.data_file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ReplayArchive:
+    """
+    Reads an archive through mmap, so games can be filtered and loaded without reading the whole file.
+
+    Attributes
+    ----------
+    path : str
+        The path of the archive. The index is read from `path + '.idx'`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data_file = open(path, 'rb')
+        self.index_file = open(get_index_path(path), 'rb')
+
+        self.data = self._map(self.data_file)
+        self.index = self._map(self.index_file)
+        if len(self.index) < INDEX_HEADER_SIZE or self.index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            self.close()
+            raise ValueError("Not a JellyBlocker replay archive index: " + get_index_path(path))
+
+        self.num_entries = (len(self.index) - INDEX_HEADER_SIZE) // INDEX_ENTRY.size
+
+    @staticmethod
+    def _map(file):
+        """
+        Map a whole file read-only, or return an empty buffer for an empty file.
+        """
+
+        if os.fstat(file.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self.num_entries
+
+    def get_entry(self, position: int) -> ArchiveEntry:
+        """
+        Read the index entry at a position in the archive.
+
+        Parameters
+        ----------
+        position : int
+            The position of the game in the archive, from 0 to `len(self) - 1`.
+
+        Returns
+        -------
+        ArchiveEntry
+            The game's index entry.
+        """
+
+        if not 0 <= position < self.num_entries:
+            raise IndexError("Archive position out of range: " + str(position))
+        return ArchiveEntry._make(INDEX_ENTRY.unpack_from(self.index, INDEX_HEADER_SIZE + position * INDEX_ENTRY.size))
+
+    def iter_entries(self, min_points=0, min_chain=0):
+        """
+        Iterate over the index entries, optionally only those with enough points or a long enough chain.
+
+        Yields
+        ------
+        ArchiveEntry
+            Each matching entry, in archive order.
+        """
+
+        for offset in range(INDEX_HEADER_SIZE, INDEX_HEADER_SIZE + self.num_entries * INDEX_ENTRY.size, INDEX_ENTRY.size):
+            fields = INDEX_ENTRY.unpack_from(self.index, offset)
+            if fields[3] >= min_points and fields[4] >= min_chain:
+                yield ArchiveEntry._make(fields)
+
+    def find(self, game_id: int) -> int:
+        """
+        Binary search the index for a game id.
+
+        Returns
+        -------
+        int
+            The position of the game in the archive.
+        """
+
+        low = 0
+        high = self.num_entries
+        while low < high:
+            middle = (low + high) // 2
+            if INDEX_ENTRY.unpack_from(self.index, INDEX_HEADER_SIZE + middle * INDEX_ENTRY.size)[0] < game_id:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == self.num_entries or self.get_entry(low).game_id != game_id:
+            raise KeyError(game_id)
+        return low
+
+    def get_replay(self, entry: ArchiveEntry) -> Replay:
+        """
+        Decode one game's replay, reading only its bytes from the mapped archive.
+        """
+
+        return Replay.from_bytes(self.data[entry.offset:entry.offset + entry.length])
+
+    def get_engine_at(self, game_id: int, tick: int):
+        """
+        Re-simulate a game up to a tick.
+
+        Returns
+        -------
+        GameEngine
+            The engine at `tick`, or at the end of the game if it ended first.
+        """
+
+        engine, _ = play_replay(self.get_replay(self.get_entry(self.find(game_id))), tick)
+        return engine
+
+    def close(self):
+        """
+        Unmap and close the archive and its index.
+        """
+
+        for mapping in (self.data, self.index):
+            if isinstance(mapping, mmap.mmap):
+                mapping.close()
+        self.data_file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,155 @@
+"""
+Runs a game's ticks at a fixed rate against a monotonic clock
+"""
+
+from threading import Event
+from time import monotonic
+
+class FixedTimestepScheduler:
+    """
+    Keeps fixed-length logic ticks on time, sleeping until the next tick that has anything to do.
+
+    Attributes
+    ----------
+    tick_duration : float, default: 0.01
+        The number of seconds in a tick.
+
+    max_catch_up_ticks : int, default: 25
+        The most ticks to run at once after falling behind, such as after a slow frame. Any more are dropped,
+        so the game slows down for a moment instead of freezing while it catches up.
+
+    clock : function, default: time.monotonic
+        Returns the current time in seconds.
+
+    Notes
+    -----
+    Tick `n` is due `n * tick_duration` seconds after the scheduler starts, so a late tick never pushes back
+    the ticks after it, and the game keeps to the clock no matter how long each tick or frame takes.
+    """
+
+    def __init__(self,
+                 tick_duration=0.01,
+                 max_catch_up_ticks=25,
+                 clock=monotonic
+                 ):
+        self.tick_duration = tick_duration
+        self.max_catch_up_ticks = max_catch_up_ticks
+        self.clock = clock
+
+        self.start_time = 0.0
+        self.current_tick = 0
+        self.expected_due_tick = 0
+        self.num_dropped_ticks = 0
+        self.running = False
+        self.wake_event = Event()
+
+    def start(self, tick=0):
+        """
+        Start counting ticks from now.
+
+        Parameters
+        ----------
+        tick : int, default: 0
+            The tick to start at.
+        """
+
+        self.start_time = self.clock() - tick * self.tick_duration
+        self.current_tick = tick
+        self.expected_due_tick = tick + 1
+        self.num_dropped_ticks = 0
+        self.running = True
+
+    def stop(self):
+        """
+        Stop `run` after its current tick, from any thread.
+        """
+
+        self.running = False
+        self.wake()
+
+    def wake(self):
+        """
+        Cut the current sleep short, from any thread, such as after an input changes when the next tick is due.
+        """
+
+        self.wake_event.set()
+
+    def get_tick_deadline(self, tick: int) -> float:
+        """
+        Get the clock time at which a tick is due.
+        """
+
+        return self.start_time + tick * self.tick_duration
+
+    def get_due_tick(self) -> int:
+        """
+        Get the tick the game should be run up to, dropping any ticks past `max_catch_up_ticks`.
+
+        Returns
+        -------
+        int
+            One past the latest tick that is due.
+        """
+
+        due_tick = int((self.clock() - self.start_time) / self.tick_duration) + 1
+
+        # if the game woke up too far behind, move the start time forward instead of running every missed tick
+        num_dropped_ticks = due_tick - self.expected_due_tick - self.max_catch_up_ticks
+        if num_dropped_ticks > 0:
+            self.start_time += num_dropped_ticks * self.tick_duration
+            self.num_dropped_ticks += num_dropped_ticks
+            due_tick -= num_dropped_ticks
+
+        if due_tick > self.current_tick:
+            self.current_tick = due_tick
+        return self.current_tick
+
+    def get_time_until_tick(self, tick: int) -> float:
+        """
+        Get the number of seconds to sleep until a tick is due, for callers that do their own sleeping.
+
+        Notes
+        -----
+        Ticks skipped by sleeping until `tick` aren't counted as falling behind by `get_due_tick`.
+        """
+
+        self.expected_due_tick = tick + 1
+        return self.get_tick_deadline(tick) - self.clock()
+
+    def wait_for_tick(self, tick: int):
+        """
+        Sleep until a tick is due, or until `wake` is called.
+        """
+
+        timeout = self.get_time_until_tick(tick)
+        if timeout > 0:
+            self.wake_event.wait(timeout)
+        self.wake_event.clear()
+
+    def run(self, advance, get_next_tick=None, start_tick=0):
+        """
+        Run the game on time until `advance` returns False or `stop` is called.
+
+        Parameters
+        ----------
+        advance : function
+            Called with the tick to run the game up to, not including it, whenever a tick is due.
+            Returns whether to keep running.
+
+        get_next_tick : function, optional
+            Returns the next tick that has anything to do, so the scheduler can sleep through the ticks before it.
+            The scheduler wakes for every tick if not given.
+
+        start_tick : int, default: 0
+            The tick to start at.
+        """
+
+        self.start(start_tick)
+        while self.running:
+            if not advance(self.get_due_tick()):
+                break
+
+            next_tick = get_next_tick() if get_next_tick is not None else self.current_tick
+            self.wait_for_tick(max(next_tick, self.current_tick))
+
+        self.running = False
@@ -0,0 +1,263 @@
+"""
+Streams a game's state as compact frames: a full keyframe every so often, and only what changed in between
+"""
+
+from Board import Board
+from GameEngine import GameEngine
+from Jelly import JellyBlock, FALLING_FLAG
+from Replay import encode_varint, decode_varint
+
+# the flags in the first byte of every frame, saying which parts of the state it holds
+KEYFRAME = 0x01
+CELLS_CHANGED = 0x02
+CURRENT_GROUP_CHANGED = 0x04
+NEXT_GROUP_CHANGED = 0x08
+STATS_CHANGED = 0x10
+
+def encode_signed_varint(value: int, buffer: bytearray):
+    """
+    Append an integer that may be negative to `buffer`, zigzag encoded so small negative numbers stay short.
+    """
+
+    encode_varint(value << 1 if value >= 0 else (-value << 1) - 1, buffer)
+
+def decode_signed_varint(data, offset: int) -> tuple:
+    """
+    Read an integer written by `encode_signed_varint`.
+
+    Returns
+    -------
+    tuple
+        `(value, offset)`, where `offset` is the position just after the varint.
+    """
+
+    value, offset = decode_varint(data, offset)
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1), offset
+
+class StateEncoder:
+    """
+    Turns a game into a stream of frames, each holding only what changed since the frame before it.
+
+    Attributes
+    ----------
+    engine : GameEngine
+        The game to stream. Frames are encoded from its published `snapshot`, never from the live game.
+
+    keyframe_interval : int, default: 500
+        The most ticks between keyframes, which hold the whole state so a subscriber can start from them.
+
+    snapshot : GameSnapshot
+        The snapshot the last frame was encoded from.
+
+    Notes
+    -----
+    A frame is a byte of flags, the tick as a varint, then each part of the state the flags say changed:
+    the cells, as a keyframe's every cell or a delta's changed `(index gap, code)` pairs, the current falling
+    group's codes and positions, the next falling group's codes, and the points, level, and pending garbage.
+    Falling group codes have `FALLING_FLAG` set on falling jellies, like the cells.
+
+    Changed cells are found by XORing the snapshot's cells with the last frame's as two big integers, so a changed
+    board costs two conversions and a step per changed cell. An unchanged game is the same snapshot, and costs nothing.
+    """
+
+    def __init__(self, engine: GameEngine, keyframe_interval=500):
+        self.engine = engine
+        self.keyframe_interval = keyframe_interval
+
+        self.snapshot = None
+        self.keyframe_tick = 0
+
+    def encode(self) -> bytes:
+        """
+        Encode what changed in the game's published snapshot since the last frame, as a keyframe if one is due.
+
+        Returns
+        -------
+        bytes
+            The frame, or None if nothing changed.
+        """
+
+        snapshot = self.engine.snapshot
+        prev_snapshot = self.snapshot
+        if snapshot is None or snapshot is prev_snapshot:
+            return None
+        self.snapshot = snapshot
+
+        if prev_snapshot is None or snapshot.width != prev_snapshot.width or \
+           len(snapshot.cells) != len(prev_snapshot.cells) or \
+           snapshot.tick - self.keyframe_tick >= self.keyframe_interval:
+            self.keyframe_tick = snapshot.tick
+            return self.get_keyframe()
+
+        flags = 0
+        buffer = bytearray()
+
+        # find the bytes that differ between the old and new cells
+        cells = snapshot.cells
+        diff = int.from_bytes(cells, 'little') ^ int.from_bytes(prev_snapshot.cells, 'little')
+        if diff:
+            flags |= CELLS_CHANGED
+            changed_indices = []
+            while diff:
+                index = ((diff & -diff).bit_length() - 1) >> 3
+                changed_indices.append(index)
+                diff &= ~(0xFF << (index << 3))
+
+            encode_varint(len(changed_indices), buffer)
+            prev_index = -1
+            for index in changed_indices:
+                encode_varint(index - prev_index - 1, buffer)
+                buffer.append(cells[index])
+                prev_index = index
+
+        if snapshot.current_group != prev_snapshot.current_group:
+            flags |= CURRENT_GROUP_CHANGED
+            self._encode_current_group(buffer)
+
+        if snapshot.next_group != prev_snapshot.next_group:
+            flags |= NEXT_GROUP_CHANGED
+            self._encode_next_group(buffer)
+
+        if (snapshot.points, snapshot.level, snapshot.pending_garbage) != \
+           (prev_snapshot.points, prev_snapshot.level, prev_snapshot.pending_garbage):
+            flags |= STATS_CHANGED
+            self._encode_stats(buffer)
+
+        if flags == 0:
+            return None
+
+        header = bytearray([flags])
+        encode_varint(snapshot.tick, header)
+        return bytes(header + buffer)
+
+    def get_keyframe(self) -> bytes:
+        """
+        Encode the whole state as of the last frame, for a subscriber joining or catching up, without
+        changing what the next frame is relative to.
+
+        Returns
+        -------
+        bytes
+            The keyframe.
+        """
+
+        snapshot = self.snapshot
+        buffer = bytearray([KEYFRAME | CELLS_CHANGED | CURRENT_GROUP_CHANGED | NEXT_GROUP_CHANGED | STATS_CHANGED])
+        encode_varint(snapshot.tick, buffer)
+        encode_varint(snapshot.width, buffer)
+        encode_varint(snapshot.height, buffer)
+        buffer += snapshot.cells
+        self._encode_current_group(buffer)
+        self._encode_next_group(buffer)
+        self._encode_stats(buffer)
+        return bytes(buffer)
+
+    def _encode_current_group(self, buffer: bytearray):
+        encode_varint(len(self.snapshot.current_group), buffer)
+        for code, row, col in self.snapshot.current_group:
+            buffer.append(code)
+            encode_signed_varint(row, buffer)
+            encode_signed_varint(col, buffer)
+
+    def _encode_next_group(self, buffer: bytearray):
+        encode_varint(len(self.snapshot.next_group), buffer)
+        buffer += self.snapshot.next_group
+
+    def _encode_stats(self, buffer: bytearray):
+        encode_varint(self.snapshot.points, buffer)
+        encode_varint(self.snapshot.level, buffer)
+        encode_varint(self.snapshot.pending_garbage, buffer)
+
+class StateDecoder:
+    """
+    Rebuilds a game's state from the frames of a `StateEncoder`, starting from a keyframe.
+
+    Attributes
+    ----------
+    board : Board
+        The rebuilt board, with the same cells, falling groups, and `state_hash` as the streamed one,
+        or None before the first keyframe.
+
+    tick : int
+        The game time of the last frame.
+
+    points : int
+        The points scored.
+
+    level : int
+        The difficulty level.
+
+    pending_garbage : int
+        The garbage waiting to drop onto the board.
+    """
+
+    def __init__(self):
+        self.board = None
+        self.tick = 0
+        self.points = 0
+        self.level = 1
+        self.pending_garbage = 0
+
+    def apply(self, frame) -> bool:
+        """
+        Apply a frame to the rebuilt state.
+
+        Parameters
+        ----------
+        frame : bytes-like
+            A frame from `StateEncoder.encode` or `StateEncoder.get_keyframe`.
+
+        Returns
+        -------
+        bool
+            Whether the frame was applied. Deltas are skipped until the first keyframe arrives.
+        """
+
+        flags = frame[0]
+        self.tick, offset = decode_varint(frame, 1)
+
+        if flags & KEYFRAME:
+            width, offset = decode_varint(frame, offset)
+            height, offset = decode_varint(frame, offset)
+            if self.board is None or self.board.width != width or self.board.height != height:
+                self.board = Board(width, height, seed=0)
+
+            board = self.board
+            for index in range(width * height):
+                if board.cells[index] != frame[offset + index]:
+                    board._set_cell(index, frame[offset + index])
+            offset += width * height
+        elif self.board is None:
+            return False
+        elif flags & CELLS_CHANGED:
+            board = self.board
+            num_changed, offset = decode_varint(frame, offset)
+            index = -1
+            for _ in range(num_changed):
+                gap, offset = decode_varint(frame, offset)
+                index += gap + 1
+                board._set_cell(index, frame[offset])
+                offset += 1
+
+        if flags & CURRENT_GROUP_CHANGED:
+            num_jellies, offset = decode_varint(frame, offset)
+            current_group = []
+            for _ in range(num_jellies):
+                code = frame[offset]
+                row, offset = decode_signed_varint(frame, offset + 1)
+                col, offset = decode_signed_varint(frame, offset)
+                current_group.append(JellyBlock.from_code(code & ~FALLING_FLAG, bool(code & FALLING_FLAG), row, col))
+            self.board.current_falling_group = current_group
+
+        if flags & NEXT_GROUP_CHANGED:
+            num_jellies, offset = decode_varint(frame, offset)
+            self.board.next_falling_group = [JellyBlock.from_code(code & ~FALLING_FLAG, bool(code & FALLING_FLAG))
+                                             for code in frame[offset:offset + num_jellies]]
+            offset += num_jellies
+
+        if flags & STATS_CHANGED:
+            self.points, offset = decode_varint(frame, offset)
+            self.level, offset = decode_varint(frame, offset)
+            self.pending_garbage, offset = decode_varint(frame, offset)
+
+        return True
@@ -0,0 +1,110 @@
+"""
+Draws the board to a terminal with ANSI escape codes, rewriting only what changed since the last frame
+"""
+
+import sys
+
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+CLEAR_TO_END_OF_LINE = '\x1b[K'
+
+def move_cursor(row: int, col: int) -> str:
+    """
+    Get the escape code that moves the cursor to a 0-indexed row and column of the terminal.
+    """
+
+    return '\x1b[' + str(row + 1) + ';' + str(col + 1) + 'H'
+
+class TerminalRenderer:
+    """
+    Keeps the last frame it drew, and draws each new frame as cursor moves and writes for just the cells
+    and panel lines that changed, in one write.
+
+    Attributes
+    ----------
+    cell_strings : list
+        The text to draw for each cell code, indexed by code.
+
+    cell_width : int, default: 2
+        The number of terminal columns each cell's text takes up.
+
+    output : file, default: sys.stdout
+        The terminal to draw to.
+
+    Notes
+    -----
+    Anything else printed to the terminal moves the cursor and can scroll the frame, so call `invalidate`
+    after printing to make the next frame redraw everything.
+    """
+
+    def __init__(self, cell_strings: list, cell_width=2, output=None):
+        self.cell_strings = cell_strings
+        self.cell_width = cell_width
+        self.output = output if output is not None else sys.stdout
+
+        self.drawn_rows = None
+        self.drawn_panel_lines = []
+
+    def invalidate(self):
+        """
+        Forget the last frame, so the next frame clears the screen and is drawn in full.
+        """
+
+        self.drawn_rows = None
+        self.drawn_panel_lines = []
+
+    def render(self, rows: list, panel_lines: list):
+        """
+        Draw a frame.
+
+        Parameters
+        ----------
+        rows : list
+            The cell codes of each row, as bytes-like objects of equal length.
+
+        panel_lines : list
+            Lines of text to draw to the right of the rows, one per row from the top.
+        """
+
+        parts = []
+        width = len(rows[0]) if rows else 0
+        if self.drawn_rows is None or len(self.drawn_rows) != len(rows) or len(self.drawn_rows[0]) != width:
+            parts.append(CLEAR_SCREEN)
+            self.drawn_rows = [None] * len(rows)
+            self.drawn_panel_lines = []
+
+        cell_strings = self.cell_strings
+        for row_index, row in enumerate(rows):
+            drawn_row = self.drawn_rows[row_index]
+
+            # comparing whole rows first skips unchanged rows without looking at their cells
+            if drawn_row == row:
+                continue
+
+            # write each run of changed cells after a single cursor move
+            col = 0
+            while col < width:
+                if drawn_row is not None and row[col] == drawn_row[col]:
+                    col += 1
+                    continue
+                start_col = col
+                while col < width and (drawn_row is None or row[col] != drawn_row[col]):
+                    col += 1
+                parts.append(move_cursor(row_index, start_col * self.cell_width))
+                parts.append(''.join([cell_strings[code] for code in row[start_col:col]]))
+
+            self.drawn_rows[row_index] = bytes(row)
+
+        panel_col = width * self.cell_width + 1
+        panel_lines = panel_lines[:len(rows)]
+        for row_index in range(max(len(panel_lines), len(self.drawn_panel_lines))):
+            line = panel_lines[row_index] if row_index < len(panel_lines) else ''
+            drawn_line = self.drawn_panel_lines[row_index] if row_index < len(self.drawn_panel_lines) else ''
+            if line != drawn_line:
+                parts.append(move_cursor(row_index, panel_col) + line + CLEAR_TO_END_OF_LINE)
+        self.drawn_panel_lines = list(panel_lines)
+
+        if parts:
+            # leave the cursor under the frame, so anything printed afterwards doesn't land on top of it
+            parts.append(move_cursor(len(rows) + 1, 0))
+            self.output.write(''.join(parts))
+            self.output.flush()
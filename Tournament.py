@@ -0,0 +1,215 @@
+"""
+Plays many headless games across processes and summarizes their results
+"""
+
+import json
+import random
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+from Board import Board
+from Bot import BotPlayer
+from GameEngine import GameEngine
+
+STATS = ('points', 'level', 'jellies_popped', 'max_chain', 'ticks', 'seconds')
+
+# the ticks after which each command line policy's games are stopped unless told otherwise
+# random and idle games always end well before their limit, but the bot can play on for hours of game time
+DEFAULT_MAX_TICKS = {'random': 200000, 'idle': 200000, 'bot': 20000}
+
+def idle_policy(engine: GameEngine):
+    """
+    A policy that never moves the falling group.
+    """
+
+    return None
+
+def random_policy(engine: GameEngine):
+    """
+    A policy that presses a random movement key on about one tick in ten.
+    """
+
+    if random.random() < 0.1:
+        return random.choice(GameEngine.ACTIONS[:4])
+    return None
+
+def play_game(policy, seed: int, board_options=None, engine_options=None, max_ticks=None) -> dict:
+    """
+    Play one headless game to the end, without sleeping or displaying anything.
+
+    Parameters
+    ----------
+    policy : function
+        Called with the engine before every tick, returns one of `GameEngine.ACTIONS` or None.
+
+    seed : int
+        The seed for the game's random falling groups.
+
+    board_options : dict, optional
+        Keyword arguments for `Board`.
+
+    engine_options : dict, optional
+        Keyword arguments for `GameEngine`.
+
+    max_ticks : int, optional
+        The number of ticks after which the game is stopped even if it isn't over.
+
+    Returns
+    -------
+    dict
+        The seed and every stat in `STATS` for the game.
+    """
+
+    start_time = perf_counter()
+
+    random.seed(seed)
+    board = Board(seed=seed, **(board_options or {}))
+    engine = GameEngine(board, **(engine_options or {}))
+    engine.reset(board)
+
+    max_chain = 0
+    game_over = False
+    while not game_over and (max_ticks is None or engine.game_time < max_ticks):
+        _, _, chain, _, game_over = engine.step(policy(engine))
+        if chain > max_chain:
+            max_chain = chain
+
+    return {
+        'seed': seed,
+        'points': engine.points,
+        'level': engine.level,
+        'jellies_popped': engine.jellies_popped_stat,
+        'max_chain': max_chain,
+        'ticks': engine.game_time,
+        'seconds': perf_counter() - start_time,
+    }
+
+def iter_games(n_games: int, policy=random_policy, seeds=None, workers=None,
+               board_options=None, engine_options=None, max_ticks=None):
+    """
+    Play games across a pool of processes, yielding each game's results as soon as it finishes.
+
+    Parameters
+    ----------
+    n_games : int
+        The number of games to play.
+
+    policy : function, default: random_policy
+        The policy every game is played with. It must be defined at module level so it can be pickled.
+
+    seeds : list, optional
+        The seed of each game. Defaults to `range(n_games)`.
+
+    workers : int, optional
+        The number of processes. Defaults to one per CPU, and 1 plays every game in this process.
+
+    board_options, engine_options, max_ticks
+        Passed to `play_game`.
+
+    Yields
+    ------
+    dict
+        The results of one game, in the order the games finish.
+    """
+
+    if seeds is None:
+        seeds = range(n_games)
+    seeds = list(seeds)[:n_games]
+
+    if workers == 1:
+        for seed in seeds:
+            yield play_game(policy, seed, board_options, engine_options, max_ticks)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_game, policy, seed, board_options, engine_options, max_ticks)
+                   for seed in seeds]
+        for future in as_completed(futures):
+            yield future.result()
+
+def get_percentile(sorted_values: list, percentile: float) -> float:
+    """
+    Linearly interpolate a percentile of an already sorted list.
+    """
+
+    if len(sorted_values) == 0:
+        return 0.0
+    position = (len(sorted_values) - 1) * percentile / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def summarize(games: list, percentiles=(5, 25, 50, 75, 95, 99)) -> dict:
+    """
+    Merge the results of many games into the mean, min, max and percentiles of every stat in `STATS`.
+
+    Parameters
+    ----------
+    games : list
+        The results from `play_game`.
+
+    percentiles : tuple, default: (5, 25, 50, 75, 95, 99)
+        The percentiles to report.
+
+    Returns
+    -------
+    dict
+        A dict of summaries, keyed by stat.
+    """
+
+    summary = {}
+    for stat in STATS:
+        values = sorted(game[stat] for game in games)
+        summary[stat] = {
+            'mean': sum(values) / len(values) if values else 0.0,
+            'min': values[0] if values else 0,
+            'max': values[-1] if values else 0,
+        }
+        for percentile in percentiles:
+            summary[stat]['p' + str(percentile)] = get_percentile(values, percentile)
+    return summary
+
+def run_many(n_games: int, policy=random_policy, seeds=None, workers=None,
+             board_options=None, engine_options=None, max_ticks=None) -> dict:
+    """
+    Play many games across a pool of processes and summarize their results.
+
+    Parameters
+    ----------
+    The same as `iter_games`.
+
+    Returns
+    -------
+    dict
+        `'games'`, the results of every game in seed order, and `'summary'`, from `summarize`.
+    """
+
+    games = list(iter_games(n_games, policy, seeds, workers, board_options, engine_options, max_ticks))
+    games.sort(key=lambda game: game['seed'])
+    return {'games': games, 'summary': summarize(games)}
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Play many headless JellyBlocker games and summarize the results.")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--policy', choices=('random', 'idle', 'bot'), default='random')
+    parser.add_argument('--falling-speed', type=int, default=100)
+    parser.add_argument('--num-pops-to-level', type=int, default=50)
+    parser.add_argument('--num-landed-iterations', type=int, default=5)
+    parser.add_argument('--max-ticks', type=int, default=None,
+                        help="stop games after this many ticks, 0 for never; defaults to the policy's DEFAULT_MAX_TICKS")
+    args = parser.parse_args()
+
+    max_ticks = args.max_ticks if args.max_ticks is not None else DEFAULT_MAX_TICKS[args.policy]
+    policies = {'random': random_policy, 'idle': idle_policy, 'bot': BotPlayer()}
+    results = run_many(args.games,
+                       policies[args.policy],
+                       workers=args.workers,
+                       engine_options={
+                           'falling_speed': args.falling_speed,
+                           'num_pops_to_level': args.num_pops_to_level,
+                           'num_landed_iterations_before_placement': args.num_landed_iterations,
+                       },
+                       max_ticks=max_ticks or None)
+    print(json.dumps(results['summary'], indent=4))
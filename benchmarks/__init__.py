@@ -0,0 +1,114 @@
+"""
+Benchmarks for the `Board` engine, with a saved JSON baseline to catch performance regressions
+
+Run them from the repository's root with `python -m benchmarks`.
+"""
+
+import json
+import os
+import platform
+import sys
+
+from benchmarks.scenarios import SCENARIOS
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+def get_metric_direction(metric: str):
+    """
+    Get which way a metric improves.
+
+    Returns
+    -------
+    int or None
+        1 if higher is better, -1 if lower is better, or None if the metric is only informational
+        and never counts as a regression, like tail latencies, which are too noisy to compare.
+    """
+
+    if metric.endswith('_per_second'):
+        return 1
+    if metric.endswith('_p50_us') or metric.endswith('_bytes'):
+        return -1
+    return None
+
+def run_benchmarks(names=None, quick=False) -> dict:
+    """
+    Run benchmark scenarios.
+
+    Parameters
+    ----------
+    names : list, optional
+        The names of the scenarios in `SCENARIOS` to run. Every scenario is run if not given.
+
+    quick : bool, default: False
+        Whether to run fewer iterations, for a faster but noisier result.
+
+    Returns
+    -------
+    dict
+        The metrics of each scenario, keyed by scenario name.
+    """
+
+    results = {}
+    for name in names if names is not None else SCENARIOS:
+        results[name] = SCENARIOS[name](quick)
+    return results
+
+def compare(results: dict, baseline: dict, threshold=0.15) -> list:
+    """
+    Find every metric that got worse than the baseline by more than `threshold`.
+
+    Parameters
+    ----------
+    results : dict
+        The metrics from `run_benchmarks`.
+
+    baseline : dict
+        The metrics of a previous run.
+
+    threshold : float, default: 0.15
+        The fraction a metric may get worse by before it counts as a regression.
+
+    Returns
+    -------
+    list
+        A `(scenario, metric, baseline_value, value, change)` tuple for every regression, where `change`
+        is the fraction the metric changed by.
+    """
+
+    regressions = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            direction = get_metric_direction(metric)
+            baseline_value = baseline.get(scenario, {}).get(metric)
+            if direction is None or not baseline_value:
+                continue
+
+            change = (value - baseline_value) / baseline_value
+            if change * direction < -threshold:
+                regressions.append((scenario, metric, baseline_value, value, change))
+    return regressions
+
+def save_baseline(results: dict, path=DEFAULT_BASELINE_PATH):
+    """
+    Save benchmark results as the baseline, with the machine they were run on.
+    """
+
+    with open(path, 'w') as file:
+        json.dump({
+            'machine': {
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'processor': platform.processor(),
+            },
+            'results': results,
+        }, file, indent=2)
+
+def load_baseline(path=DEFAULT_BASELINE_PATH):
+    """
+    Load the results saved by `save_baseline`, or None if there is no baseline yet.
+    """
+
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)['results']
@@ -0,0 +1,39 @@
+import json
+import sys
+from argparse import ArgumentParser
+
+from benchmarks import DEFAULT_BASELINE_PATH, SCENARIOS, compare, load_baseline, run_benchmarks, save_baseline
+
+parser = ArgumentParser(description="Benchmark the Board engine and compare the results to a saved baseline.")
+parser.add_argument('scenarios', nargs='*',
+                    help="the scenarios to run, from " + ", ".join(SCENARIOS) + ", or every scenario if none are given")
+parser.add_argument('--quick', action='store_true', help="run fewer iterations")
+parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help="the baseline JSON file")
+parser.add_argument('--save-baseline', action='store_true', help="save the results as the new baseline")
+parser.add_argument('--threshold', type=float, default=0.15,
+                    help="the fraction a metric may get worse by before it is flagged")
+args = parser.parse_args()
+for name in args.scenarios:
+    if name not in SCENARIOS:
+        parser.error("unknown scenario: " + name)
+
+results = run_benchmarks(args.scenarios or None, args.quick)
+print(json.dumps(results, indent=4))
+
+if args.save_baseline:
+    save_baseline(results, args.baseline)
+    print("Saved the baseline to", args.baseline)
+    sys.exit(0)
+
+baseline = load_baseline(args.baseline)
+if baseline is None:
+    print("No baseline at", args.baseline + ", run with --save-baseline to create one.")
+    sys.exit(0)
+
+regressions = compare(results, baseline, args.threshold)
+for scenario, metric, baseline_value, value, change in regressions:
+    print("REGRESSION", scenario + "." + metric + ":", round(baseline_value, 3), "->", round(value, 3),
+          "(" + format(change, '+.1%') + ")")
+if regressions:
+    sys.exit(1)
+print("No regressions beyond", format(args.threshold, '.0%'), "of the baseline.")
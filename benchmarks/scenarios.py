@@ -0,0 +1,249 @@
+"""
+Fixed-seed scenarios that time the `Board` engine
+"""
+
+import random
+import tracemalloc
+from time import perf_counter, perf_counter_ns
+
+from Board import Board
+from Tournament import get_percentile
+
+def play_random_placements(board: Board, rng: random.Random, max_placements: int) -> int:
+    """
+    Drop falling groups into random columns and orientations, resolving each chain, until the game is over.
+
+    Returns
+    -------
+    int
+        The number of placements made.
+    """
+
+    board.add_falling_group_to_board()
+    num_placements = 0
+    while num_placements < max_placements:
+        for _ in range(rng.randrange(4)):
+            board.rotate_falling_group_right()
+        min_col, max_col = board.get_reachable_cols()
+        board.drop_falling_group_at(rng.randint(min_col, max_col))
+        num_placements += 1
+
+        if not board.cycle_falling_groups():
+            break
+        while True:
+            board.settle()
+            if board.pop_jellies() == 0:
+                break
+
+    return num_placements
+
+def fill_board(board: Board, get_code):
+    """
+    Fill every cell of a board with the code `get_code(row, col)` returns.
+    """
+
+    for row in range(board.height):
+        for col in range(board.width):
+            board._set_cell(row * board.width + col, get_code(row, col))
+
+def resolve(board: Board, pop_durations=None, gravity_durations=None) -> int:
+    """
+    Pop and drop a board one gravity step at a time until nothing is left to pop, like an animated chain.
+
+    Parameters
+    ----------
+    pop_durations : list, optional
+        A list to append the duration of every `pop_jellies` call to, in nanoseconds.
+
+    gravity_durations : list, optional
+        A list to append the duration of every `apply_gravity` call to, in nanoseconds.
+
+    Returns
+    -------
+    int
+        The length of the chain.
+    """
+
+    chain = 0
+    while True:
+        start = perf_counter_ns()
+        num_jellies_popped = board.pop_jellies()
+        if pop_durations is not None:
+            pop_durations.append(perf_counter_ns() - start)
+        if num_jellies_popped == 0:
+            return chain
+        chain += 1
+
+        while True:
+            start = perf_counter_ns()
+            moved = board.apply_gravity()
+            if gravity_durations is not None:
+                gravity_durations.append(perf_counter_ns() - start)
+            if not moved:
+                break
+
+def make_chain_board(width: int, height: int, num_seeds: int) -> Board:
+    """
+    Fill boards with random jellies from fixed seeds, and keep the one with the longest chain.
+    """
+
+    best_board = None
+    best_chain = -1
+    for seed in range(num_seeds):
+        board = Board(width, height, seed=seed)
+        codes = board.color_codes
+        fill_rng = random.Random(seed)
+        fill_board(board, lambda row, col: fill_rng.choice(codes))
+
+        snapshot = board.snapshot()
+        chain = resolve(board)
+        board.restore(snapshot)
+        if chain > best_chain:
+            best_board = board
+            best_chain = chain
+
+    return best_board
+
+def summarize_durations(name: str, durations: list) -> dict:
+    """
+    Get the median and 99th percentile of durations in nanoseconds, in microseconds.
+    """
+
+    durations = sorted(durations)
+    return {
+        name + '_p50_us': get_percentile(durations, 50) / 1e3,
+        name + '_p99_us': get_percentile(durations, 99) / 1e3,
+    }
+
+def bench_placements(width: int, height: int, num_colors: int, num_placements: int) -> dict:
+    """
+    Time random placement games on boards of one size, starting a new fixed-seed game whenever one ends.
+    """
+
+    rng = random.Random(0)
+    seed = 0
+    total_placements = 0
+    start = perf_counter()
+    while total_placements < num_placements:
+        board = Board(width, height, num_colors, seed=seed)
+        total_placements += play_random_placements(board, rng, num_placements - total_placements)
+        seed += 1
+    elapsed = perf_counter() - start
+
+    return {'placements_per_second': total_placements / elapsed, 'games': seed}
+
+def bench_random_placements(quick: bool) -> dict:
+    return bench_placements(6, 13, 4, 2000 if quick else 20000)
+
+def bench_tall_board(quick: bool) -> dict:
+    return bench_placements(6, 40, 4, 2000 if quick else 20000)
+
+def bench_wide_board(quick: bool) -> dict:
+    return bench_placements(30, 13, 5, 2000 if quick else 20000)
+
+def bench_chain_board(quick: bool) -> dict:
+    """
+    Time `pop_jellies` and `apply_gravity` while a full board of random jellies resolves its longest chain.
+    """
+
+    board = make_chain_board(6, 13, 50 if quick else 200)
+
+    pop_durations = []
+    gravity_durations = []
+    for _ in range(20 if quick else 200):
+        snapshot = board.snapshot()
+        chain = resolve(board, pop_durations, gravity_durations)
+        board.restore(snapshot)
+
+    results = {'chain': chain}
+    results.update(summarize_durations('pop_jellies', pop_durations))
+    results.update(summarize_durations('apply_gravity', gravity_durations))
+    return results
+
+def bench_full_board(quick: bool) -> dict:
+    """
+    Time `pop_jellies` on full boards of three-jelly groups, where every jelly has a same-colored neighbor
+    but none pop, and `apply_gravity` where nothing can fall.
+    """
+
+    results = {}
+    for width, height in ((6, 13), (30, 40)):
+        board = Board(width, height, num_colors=4, seed=0)
+        codes = board.color_codes
+
+        # rows of three-wide runs, shifted by one color every row so no run touches another of its color
+        fill_board(board, lambda row, col: codes[(col // 3 + row) % len(codes)])
+
+        pop_durations = []
+        gravity_durations = []
+        for _ in range(200 if quick else 2000):
+            board.dirty_mask = board._full_mask
+            start = perf_counter_ns()
+            board.pop_jellies()
+            pop_durations.append(perf_counter_ns() - start)
+
+            start = perf_counter_ns()
+            board.apply_gravity()
+            gravity_durations.append(perf_counter_ns() - start)
+
+        size = str(width) + 'x' + str(height)
+        results.update(summarize_durations(size + '_pop_jellies', pop_durations))
+        results.update(summarize_durations(size + '_apply_gravity', gravity_durations))
+    return results
+
+def bench_random_board(quick: bool) -> dict:
+    """
+    Time the first `pop_jellies` on full boards of random jellies from fixed seeds.
+    """
+
+    pop_durations = []
+    for seed in range(200 if quick else 2000):
+        board = Board(6, 13, seed=seed)
+        codes = board.color_codes
+        fill_rng = random.Random(seed)
+        fill_board(board, lambda row, col: fill_rng.choice(codes))
+
+        start = perf_counter_ns()
+        board.pop_jellies()
+        pop_durations.append(perf_counter_ns() - start)
+
+    return summarize_durations('pop_jellies', pop_durations)
+
+def bench_memory(quick: bool) -> dict:
+    """
+    Measure the memory each board takes, and each grid of `JellyBlock`s built by `Board.board`.
+    """
+
+    num_boards = 100 if quick else 1000
+
+    # the shared zobrist keys are allocated with the first board, so don't count them
+    Board(seed=0)
+
+    tracemalloc.start()
+    start_size, _ = tracemalloc.get_traced_memory()
+    boards = []
+    for seed in range(num_boards):
+        board = Board(seed=seed)
+        board.add_falling_group_to_board()
+        boards.append(board)
+    board_size, _ = tracemalloc.get_traced_memory()
+    grids = [board.board for board in boards]
+    grid_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del grids
+    return {
+        'board_bytes': (board_size - start_size) / num_boards,
+        'grid_bytes': (grid_size - board_size) / num_boards,
+    }
+
+# every scenario, by name
+SCENARIOS = {
+    'random_placements': bench_random_placements,
+    'tall_board': bench_tall_board,
+    'wide_board': bench_wide_board,
+    'chain_board': bench_chain_board,
+    'full_board': bench_full_board,
+    'random_board': bench_random_board,
+    'memory': bench_memory,
+}
@@ -0,0 +1,57 @@
+"""
+Starts JellyBlocker, either interactively in the terminal or headless for scripts and worker processes
+"""
+
+import json
+from argparse import ArgumentParser
+
+def main(argv=None):
+    """
+    Parse the command line and run the game in the mode it asks for.
+
+    Parameters
+    ----------
+    argv : list, optional
+        The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+
+    parser = ArgumentParser(description="Play JellyBlocker in the terminal, or headless with a policy.")
+    parser.add_argument('--headless', action='store_true',
+                        help="play without a display or keyboard, printing each game's results as a JSON line")
+    parser.add_argument('--policy', choices=('random', 'idle', 'bot'), default='bot',
+                        help="who plays headless games")
+    parser.add_argument('--games', type=int, default=1, help="the number of headless games to play")
+    parser.add_argument('--seed', type=int, default=0, help="the seed of the first headless game")
+    parser.add_argument('--workers', type=int, default=1, help="the number of processes to play headless games on")
+    parser.add_argument('--max-ticks', type=int, default=None,
+                        help="stop headless games after this many ticks, 0 for never; "
+                             "defaults to the policy's limit in Tournament.DEFAULT_MAX_TICKS")
+    parser.add_argument('--width', type=int, default=6, help="the board width of headless games")
+    parser.add_argument('--height', type=int, default=13, help="the board height of headless games")
+    parser.add_argument('--num-colors', type=int, default=4, help="the number of colors in headless games")
+    parser.add_argument('--max-fps', type=int, default=30, help="the most frames to draw per second")
+    args = parser.parse_args(argv)
+
+    # each mode only imports what it needs, so headless runs never load a keyboard backend
+    if args.headless:
+        from Bot import BotPlayer
+        from Tournament import DEFAULT_MAX_TICKS, idle_policy, iter_games, random_policy
+
+        max_ticks = args.max_ticks if args.max_ticks is not None else DEFAULT_MAX_TICKS[args.policy]
+        board_options = {'width': args.width, 'height': args.height, 'num_colors': args.num_colors}
+        policies = {'random': random_policy, 'idle': idle_policy, 'bot': BotPlayer()}
+        for results in iter_games(args.games,
+                                  policies[args.policy],
+                                  range(args.seed, args.seed + args.games),
+                                  args.workers,
+                                  board_options,
+                                  max_ticks=max_ticks or None):
+            print(json.dumps(results), flush=True)
+    else:
+        from CommandLineGUI import CommandLineGUI
+
+        cmd_gui = CommandLineGUI(max_fps=args.max_fps)
+        cmd_gui.run_program()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import random
+
+import numpy as np
+
+from BatchBoard import BatchBoard, COLOR_CODES, EMPTY, GARBAGE
+from Board import Board
+
+def test_pop_jellies_matches_board_with_garbage():
+    rng = random.Random(0)
+    width, height, num_boards = 6, 13, 300
+    codes = [EMPTY, GARBAGE, GARBAGE] + [int(code) for code in COLOR_CODES[:4]] * 2
+
+    batch_board = BatchBoard(num_boards, width, height)
+    boards = []
+    for index in range(num_boards):
+        board = Board(width, height, seed=index)
+        for cell in range(width * height):
+            code = rng.choice(codes)
+            board._set_cell(cell, code)
+            batch_board.cells[index].flat[cell] = code
+        boards.append(board)
+
+    num_garbage = np.count_nonzero(batch_board.cells == GARBAGE)
+    num_popped = batch_board.pop_jellies()
+    for index, board in enumerate(boards):
+        assert num_popped[index] == board.pop_jellies()
+        assert bytes(batch_board.cells[index].ravel()) == bytes(board.cells)
+
+    # make sure some garbage was actually cleared
+    assert np.count_nonzero(batch_board.cells == GARBAGE) < num_garbage
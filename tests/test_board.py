@@ -0,0 +1,102 @@
+import random
+
+from Board import Board, EMPTY, GARBAGE
+from Jelly import FALLING_FLAG
+
+def pop_reference(cells: list, width: int, height: int, num_connecting_jellies_to_pop: int) -> int:
+    """
+    Pop `cells` in place with a plain breadth first search, the way the original board did.
+    """
+
+    def get_neighbors(index):
+        row, col = divmod(index, width)
+        if col > 0:
+            yield index - 1
+        if col < width - 1:
+            yield index + 1
+        if row > 0:
+            yield index - width
+        if row < height - 1:
+            yield index + width
+
+    popped = set()
+    visited = set()
+    for index, code in enumerate(cells):
+        if code == EMPTY or code == GARBAGE or code & FALLING_FLAG or index in visited:
+            continue
+        group = [index]
+        visited.add(index)
+        for group_index in group:
+            for neighbor in get_neighbors(group_index):
+                if neighbor not in visited and cells[neighbor] == code:
+                    visited.add(neighbor)
+                    group.append(neighbor)
+        if len(group) >= num_connecting_jellies_to_pop:
+            popped.update(group)
+
+    cleared = set(popped)
+    for index in popped:
+        cleared.update(neighbor for neighbor in get_neighbors(index) if cells[neighbor] == GARBAGE)
+    for index in cleared:
+        cells[index] = EMPTY
+    return len(popped)
+
+def make_board(width, height, num_connecting_jellies_to_pop, codes, seed):
+    board = Board(width, height, num_connecting_jellies_to_pop=num_connecting_jellies_to_pop, seed=seed)
+    for index, code in enumerate(codes):
+        if code != EMPTY:
+            board._set_cell(index, code)
+    return board
+
+def test_pop_jellies_matches_reference():
+    rng = random.Random(0)
+    for trial in range(1500):
+        width = rng.choice((1, 3, 6, 8))
+        height = rng.choice((2, 5, 13))
+        num_connecting_jellies_to_pop = rng.randint(1, 6)
+        num_colors = rng.randint(1, 5)
+        empty_chance = rng.random() * 0.5
+        garbage_chance = rng.choice((0, 0.1, 0.3))
+
+        codes = []
+        for _ in range(width * height):
+            roll = rng.random()
+            if roll < empty_chance:
+                codes.append(EMPTY)
+            elif roll < empty_chance + garbage_chance:
+                codes.append(GARBAGE)
+            else:
+                code = GARBAGE + rng.randint(1, num_colors)
+                codes.append(code | FALLING_FLAG if rng.random() < 0.05 else code)
+
+        board = make_board(width, height, num_connecting_jellies_to_pop, codes, trial)
+        expected_num_popped = pop_reference(codes, width, height, num_connecting_jellies_to_pop)
+
+        assert board.pop_jellies() == expected_num_popped
+        assert list(board.cells) == codes
+
+        # the bitboards and hash must agree with a board written from scratch with the same cells
+        fresh = make_board(width, height, num_connecting_jellies_to_pop, codes, trial)
+        assert board.color_masks == fresh.color_masks
+        assert board.column_tops == fresh.column_tops
+        assert board.zobrist_hash == fresh.zobrist_hash
+
+def test_large_group_pops_from_one_dirty_jelly():
+    # a row of five reds on the bottom of a 6x3 board, with only its end jelly dirty
+    red = GARBAGE + 1
+    board = Board(6, 3, num_connecting_jellies_to_pop=5, seed=0)
+    for col in range(5):
+        board._set_cell(2 * 6 + col, red)
+    board.dirty_mask = 1 << (2 * 6 + 4)
+
+    assert board.pop_jellies() == 5
+    assert bytes(board.cells) == bytes(18)
+
+def test_large_group_too_small_to_pop():
+    red = GARBAGE + 1
+    board = Board(6, 3, num_connecting_jellies_to_pop=6, seed=0)
+    for col in range(5):
+        board._set_cell(2 * 6 + col, red)
+
+    assert board.pop_jellies() == 0
+    assert board.cells[2 * 6] == red
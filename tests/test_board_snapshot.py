@@ -0,0 +1,72 @@
+import random
+
+from Board import Board
+
+def get_state(board: Board) -> tuple:
+    return (bytes(board.cells),
+            list(board.color_masks),
+            list(board.column_tops),
+            board.zobrist_hash,
+            board.dirty_mask,
+            [(jelly.code, jelly.falling, jelly.row, jelly.col) for jelly in board.current_falling_group],
+            [(jelly.code, jelly.falling, jelly.row, jelly.col) for jelly in board.next_falling_group],
+            board.random.getstate())
+
+def play(board: Board, rng: random.Random, num_placements: int):
+    """
+    Move, drop, place, settle, pop, and add garbage, touching everything a snapshot has to undo.
+    """
+
+    for _ in range(num_placements):
+        board.move_falling_group_left()
+        board.rotate_falling_group_right()
+        board.move_falling_group_down()
+        min_col, max_col = board.get_reachable_cols()
+        board.drop_falling_group_at(rng.randint(min_col, max_col))
+        if not board.cycle_falling_groups():
+            return
+        board.add_garbage(rng.randrange(1, 8), rng)
+        while True:
+            board.settle()
+            if board.pop_jellies() == 0:
+                break
+
+def test_nested_snapshots_restore_everything():
+    rng = random.Random(0)
+    board = Board(seed=7)
+    board.add_falling_group_to_board()
+    play(board, rng, 5)
+
+    outer_state = get_state(board)
+    outer = board.snapshot(save_random=True)
+    play(board, rng, 3)
+
+    inner_state = get_state(board)
+    inner = board.snapshot(save_random=True)
+    play(board, rng, 3)
+    assert get_state(board) != inner_state
+
+    board.restore(inner)
+    assert get_state(board) == inner_state
+    assert board.journal is not None
+
+    play(board, rng, 3)
+    board.restore(outer)
+    assert get_state(board) == outer_state
+    assert board.journal is None
+
+def test_release_keeps_changes_and_stops_journaling():
+    rng = random.Random(1)
+    board = Board(seed=3)
+    board.add_falling_group_to_board()
+
+    outer = board.snapshot(save_random=True)
+    inner = board.snapshot()
+    play(board, rng, 4)
+    played_state = get_state(board)
+
+    board.release(inner)
+    assert board.journal is not None
+    board.release(outer)
+    assert board.journal is None
+    assert get_state(board) == played_state
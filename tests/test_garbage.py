@@ -0,0 +1,31 @@
+from Board import Board
+from GameEngine import GameEngine
+
+def get_group_codes(board, num_groups):
+    return [[jelly.code for jelly in board.get_random_jelly_falling_group()] for _ in range(num_groups)]
+
+def test_garbage_keeps_falling_groups_in_step():
+    engines = []
+    for _ in range(2):
+        engine = GameEngine()
+        engine.reset(Board(seed=1234), garbage_seed=1234)
+        engines.append(engine)
+
+    # a partial row of garbage is the part that picks random columns
+    engines[0].receive_garbage(3)
+    engines[0].end_chain()
+    assert engines[0].pending_garbage == 0
+    assert engines[0].board.cells != engines[1].board.cells
+
+    assert get_group_codes(engines[0].board, 50) == get_group_codes(engines[1].board, 50)
+
+def test_garbage_columns_follow_garbage_seed():
+    boards = []
+    for _ in range(2):
+        engine = GameEngine()
+        engine.reset(Board(seed=1), garbage_seed=99)
+        engine.receive_garbage(4)
+        engine.end_chain()
+        boards.append(bytes(engine.board.cells))
+
+    assert boards[0] == boards[1]
@@ -0,0 +1,25 @@
+import copy
+import pickle
+
+from Board import Board
+from Jelly import EMPTY_JELLY, Jelly
+
+def test_empty_jelly_copy():
+    assert copy.copy(EMPTY_JELLY) is EMPTY_JELLY
+
+def test_empty_jelly_deepcopy():
+    assert copy.deepcopy(EMPTY_JELLY) is EMPTY_JELLY
+
+def test_empty_jelly_pickle():
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        assert pickle.loads(pickle.dumps(EMPTY_JELLY, protocol)) is EMPTY_JELLY
+
+def test_board_view_deepcopy_and_pickle():
+    board = Board(seed=0)
+    board.add_falling_group_to_board()
+
+    for grid in (copy.deepcopy(board.board), pickle.loads(pickle.dumps(board.board))):
+        assert [[jelly.cell_code for jelly in row] for row in grid] == \
+               [[jelly.cell_code for jelly in row] for row in board.board]
+        assert grid[-1][0] is EMPTY_JELLY
+        assert any(jelly.color != Jelly.EMPTY for row in grid for jelly in row)
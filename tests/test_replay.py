@@ -0,0 +1,51 @@
+import random
+
+from Board import Board
+from GameEngine import GameEngine
+from Replay import Replay, ReplayRecorder, decode_varint, encode_varint, verify_replay
+
+def record_game(seed: int) -> Replay:
+    rng = random.Random(seed)
+    engine = GameEngine(instant_gravity=False, falling_speed=30)
+    engine.reset(Board(seed=seed))
+    recorder = ReplayRecorder(engine)
+
+    while not engine.game_finished and engine.game_time < 50000:
+        # sometimes several actions land on the same tick
+        if rng.random() < 0.05:
+            for _ in range(rng.randint(1, 3)):
+                recorder.apply_action(rng.choice(GameEngine.ACTIONS[:4]))
+        recorder.step(rng.choice(GameEngine.ACTIONS) if rng.random() < 0.1 else None)
+
+    return recorder.finish()
+
+def test_varint_round_trip():
+    values = [0, 1, 127, 128, 300, 2 ** 32, 2 ** 64 - 1]
+    buffer = bytearray()
+    for value in values:
+        encode_varint(value, buffer)
+
+    offset = 0
+    for value in values:
+        decoded, offset = decode_varint(buffer, offset)
+        assert decoded == value
+    assert offset == len(buffer)
+
+def test_replay_round_trip_and_verify():
+    for seed in range(4):
+        replay = record_game(seed)
+        assert replay.max_chain > 0
+        assert any(tick == next_tick for (tick, _), (next_tick, _) in zip(replay.inputs, replay.inputs[1:]))
+
+        decoded = Replay.from_bytes(replay.to_bytes())
+        assert decoded.board_options == replay.board_options
+        assert decoded.engine_options == replay.engine_options
+        assert decoded.inputs == replay.inputs
+        assert (decoded.final_tick, decoded.points, decoded.max_chain) == \
+               (replay.final_tick, replay.points, replay.max_chain)
+        assert verify_replay(decoded)
+
+def test_tampered_replay_fails_verification():
+    replay = Replay.from_bytes(record_game(0).to_bytes())
+    replay.points += 1
+    assert not verify_replay(replay)
@@ -0,0 +1,70 @@
+import random
+
+from Board import Board
+from GameEngine import GameEngine
+from StateStream import StateDecoder, StateEncoder
+
+def get_falling_groups(board: Board) -> tuple:
+    return ([(jelly.code, jelly.falling, jelly.row, jelly.col) for jelly in board.current_falling_group],
+            [jelly.code for jelly in board.next_falling_group])
+
+def check_decoder(decoder: StateDecoder, engine: GameEngine):
+    assert bytes(decoder.board.cells) == bytes(engine.board.cells)
+    assert decoder.board.state_hash() == engine.board.state_hash()
+    assert get_falling_groups(decoder.board) == get_falling_groups(engine.board)
+    assert decoder.points == engine.points
+    assert decoder.level == engine.level
+
+def stream_game(instant_gravity: bool):
+    rng = random.Random(4)
+    engine = GameEngine(instant_gravity=instant_gravity, falling_speed=20)
+    engine.reset(Board(seed=11))
+    encoder = StateEncoder(engine, keyframe_interval=50)
+    decoder = StateDecoder()
+    late_decoder = None
+
+    def policy(engine):
+        if rng.random() < 0.2:
+            return rng.choice(GameEngine.ACTIONS)
+        return None
+
+    for tick in range(1, 4000):
+        engine.advance(tick, policy)
+        frame = encoder.encode()
+        if frame is not None:
+            decoder.apply(frame)
+            if late_decoder is not None:
+                late_decoder.apply(frame)
+        check_decoder(decoder, engine)
+
+        # a subscriber joining mid game starts from a keyframe of the last frame, then follows the deltas
+        if tick == 300:
+            late_decoder = StateDecoder()
+            assert late_decoder.apply(encoder.get_keyframe())
+        if late_decoder is not None:
+            check_decoder(late_decoder, engine)
+
+        if engine.game_finished:
+            break
+    assert late_decoder is not None
+
+def test_stream_matches_game_with_instant_gravity():
+    stream_game(True)
+
+def test_stream_matches_game_with_animated_gravity():
+    stream_game(False)
+
+def test_deltas_are_skipped_until_a_keyframe():
+    engine = GameEngine()
+    engine.reset(Board(seed=0))
+    encoder = StateEncoder(engine)
+    keyframe = encoder.encode()
+    engine.apply_action('move left')
+    engine.publish_snapshot()
+    delta = encoder.encode()
+
+    decoder = StateDecoder()
+    assert not decoder.apply(delta)
+    assert decoder.apply(keyframe)
+    assert decoder.apply(delta)
+    check_decoder(decoder, engine)